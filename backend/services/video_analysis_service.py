@@ -23,6 +23,7 @@ from utils.analysis import (
     calculate_emotion_statistics,
     calculate_satisfaction_score
 )
+from exceptions import NoFaceDetectedError
 
 from backend.models.analysis_report import AnalysisReport
 from backend.models.interview import Interview
@@ -165,6 +166,9 @@ class VideoAnalysisService:
                         if analyzed_count % 10 == 0:
                             logger.info(f"📊 Analyzed {analyzed_count} frames...")
 
+                except NoFaceDetectedError:
+                    # Frames without a face are skipped, not analysis failures
+                    pass
                 except Exception as e:
                     logger.warning(f"⚠️ Frame {frame_count} analysis failed: {e}")
 
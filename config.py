@@ -5,6 +5,7 @@ This module handles all configuration settings including:
 - File paths (models, fonts, output)
 - Camera settings
 - Analysis parameters
+- Video transcoding
 - Logging configuration
 
 All settings can be overridden using environment variables.
@@ -28,6 +29,7 @@ class PathConfig:
         'KERAS_MODEL_PATH', MODEL_DIR / 'keras_model.h5'
     ))
     LABELS_PATH = Path(os.getenv('LABELS_PATH', MODEL_DIR / 'labels.txt'))
+    CALIBRATION_DIR = Path(os.getenv('CALIBRATION_DIR', MODEL_DIR / 'calibration'))
     
     # Font paths
     FONT_DIR = Path(os.getenv('FONT_DIR', './fonts'))
@@ -45,13 +47,33 @@ class PathConfig:
         """
         Validate that all required files exist.
         
+        Files sharing a directory (e.g. model and labels under MODEL_DIR)
+        are checked with a single os.scandir of that directory.
+        
         Returns:
             Dict mapping path names to their existence status.
         """
+        required = {
+            'keras_model': cls.KERAS_MODEL_PATH,
+            'labels': cls.LABELS_PATH,
+            'font': cls.FONT_PATH,
+        }
+        
+        listings = {}
+        for path in required.values():
+            parent = path.parent
+            if parent not in listings:
+                try:
+                    with os.scandir(parent) as entries:
+                        listings[parent] = {
+                            entry.name for entry in entries if entry.is_file()
+                        }
+                except OSError:
+                    listings[parent] = set()
+        
         return {
-            'keras_model': cls.KERAS_MODEL_PATH.exists(),
-            'labels': cls.LABELS_PATH.exists(),
-            'font': cls.FONT_PATH.exists(),
+            name: path.name in listings[path.parent]
+            for name, path in required.items()
         }
     
     @classmethod
@@ -145,6 +167,38 @@ class AnalysisConfig:
     DEEPFACE_FRAME_SKIP = int(os.getenv('DEEPFACE_FRAME_SKIP', 5))
     """Number of frames to skip between DeepFace analyses."""
 
+    DEEPFACE_QUANTIZED_MODEL_DIR = os.getenv('DEEPFACE_QUANTIZED_MODEL_DIR')
+    """Directory of TFLite attribute models (unset = FP32 DeepFace models)."""
+
+    DEEPFACE_QUANTIZED_PRECISION = os.getenv('DEEPFACE_QUANTIZED_PRECISION', 'fp16')
+    """Precision tag of the TFLite attribute models ('fp16' or 'int8')."""
+
+    DEEPFACE_COMPILE_MODELS = os.getenv('DEEPFACE_COMPILE_MODELS', 'false').lower() == 'true'
+    """Run DeepFace's Keras attribute models via XLA-compiled tf.function."""
+
+    DEEPFACE_OPENCV_THREADS = int(os.getenv('DEEPFACE_OPENCV_THREADS', min(4, os.cpu_count() or 1)))
+    """OpenCV thread pool size set by the async analyzers (process-wide; 0 disables threading)."""
+
+    # Classifier runtime
+    MODEL_RUNTIME = os.getenv('MODEL_RUNTIME', 'keras').lower()
+    """Inference runtime for the Keras classifier ('keras' or 'tflite')."""
+
+    MODEL_PRECISION = os.getenv('MODEL_PRECISION', 'fp32').lower()
+    """Classifier precision ('fp32', 'fp16' or 'int8'); non-fp32 implies tflite."""
+
+    NUMBA_PREPROCESS = os.getenv('NUMBA_PREPROCESS', 'false').lower() == 'true'
+    """Use the fused Numba resize+normalize kernel for 224x224 input (needs numba)."""
+
+    # Unchanged-scene classification skip (perceptual hash)
+    FRAME_HASH_SKIP = os.getenv('FRAME_HASH_SKIP', 'true').lower() == 'true'
+    """Reuse the previous classification when the frame's 64-bit aHash barely changed."""
+
+    FRAME_HASH_MAX_DISTANCE = int(os.getenv('FRAME_HASH_MAX_DISTANCE', 4))
+    """Hamming distance below which two frames count as the same scene."""
+
+    FRAME_HASH_MAX_AGE_SEC = float(os.getenv('FRAME_HASH_MAX_AGE_SEC', 0.5))
+    """Maximum age of a reused classification before the model runs again."""
+
     # Detection confidence threshold
     MIN_CONFIDENCE = 0.5
     """Minimum confidence score for person detection (0.0-1.0)."""
@@ -226,6 +280,38 @@ class AnalysisConfig:
         return round(score, 2)
 
 
+class VideoConfig:
+    """Recording and transcoding configuration."""
+    
+    # NVENC (h264_nvenc) settings used when the encoder is available
+    NVENC_PRESET = os.getenv('NVENC_PRESET', 'p4')
+    """NVENC preset from p1 (fastest) to p7 (best quality)."""
+    
+    NVENC_CQ = int(os.getenv('NVENC_CQ', 23))
+    """Constant-quality target for NVENC VBR rate control (lower = better)."""
+
+    # Recording (cv2.VideoWriter) settings
+    RECORD_FOURCC = os.getenv('RECORD_FOURCC', 'XVID')
+    """Recording FOURCC ('XVID', 'H264', 'HEVC', ...); H264/HEVC use the CUDA writer when available."""
+    
+    RECORD_HW_ACCELERATION = os.getenv('RECORD_HW_ACCELERATION', 'false').lower() == 'true'
+    """Request VIDEO_ACCELERATION_ANY from the FFmpeg writer backend."""
+    
+    # Software (libx264) fallback settings
+    X264_PRESET = os.getenv('X264_PRESET', 'veryfast')
+    """libx264 preset used when NVENC is unavailable."""
+    
+    X264_CRF = int(os.getenv('X264_CRF', 23))
+    """libx264 constant rate factor (lower = better)."""
+    
+    # Output stream layout
+    GOP_SECONDS = float(os.getenv('GOP_SECONDS', 2))
+    """Keyframe interval in seconds (GOP = fps * GOP_SECONDS)."""
+    
+    SHORT_CLIP_SEC = 60
+    """Software-encoded clips shorter than this use -tune fastdecode."""
+
+
 class LogConfig:
     """Logging configuration."""
     
@@ -244,16 +330,27 @@ class Config:
     paths = PathConfig
     camera = CameraConfig
     analysis = AnalysisConfig
+    video = VideoConfig
     logging = LogConfig
     
+    _validated = False
+    """Set once validate() has succeeded; failures are never cached."""
+    
     @classmethod
     def validate(cls):
         """
         Validate the entire configuration.
         
+        Only a successful result is cached (for the life of the process);
+        a failed validation is re-checked on the next call, so files or
+        directories created afterwards are picked up.
+        
         Returns:
             Tuple of (is_valid, error_message).
         """
+        if cls._validated:
+            return True, None
+        
         # Check for missing files
         missing_files = cls.paths.get_missing_files()
         if missing_files:
@@ -272,6 +369,7 @@ class Config:
         except Exception as e:
             return False, f"Failed to create output directories: {e}"
         
+        cls._validated = True
         return True, None
 
 
@@ -281,5 +379,6 @@ __all__ = [
     'PathConfig',
     'CameraConfig',
     'AnalysisConfig',
+    'VideoConfig',
     'LogConfig',
 ]
@@ -54,6 +54,17 @@ class AnalysisError(EmotionAnalysisError):
         super().__init__(message)
 
 
+class NoFaceDetectedError(AnalysisError):
+    """Exception raised when no face is found in the analyzed frame.
+
+    Unlike other analysis failures this is deterministic for a given
+    frame, so retrying the same frame is pointless.
+    """
+    
+    def __init__(self, message: str = "No face detected in frame"):
+        super().__init__(message)
+
+
 class ConfigurationError(EmotionAnalysisError):
     """Exception raised for configuration errors."""
     
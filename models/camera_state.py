@@ -17,6 +17,9 @@ class CameraState:
     This class replaces the previous global variables approach with a
     clean, encapsulated data structure that can be easily extended.
     
+    All timestamps are time.monotonic() values; pass the same clock as
+    current_time to the elapsed-time helpers.
+    
     Attributes:
         person_detected: Whether a person is currently detected.
         session_end_detected: Whether session end (Class 2) is detected.
@@ -15,28 +15,33 @@ import sys
 import time
 import json
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
+
 from config import Config
 from models import CameraState
 from utils import (
     setup_logging,
     get_logger,
     load_keras_model,
-    classify_frame,
     analyze_with_demographics,
     analyze_emotions_only,
     draw_analysis_results,
     resize_and_flip_frame,
     create_video_writer,
-    convert_avi_to_mp4,
+    convert_avi_to_mp4_batch,
     release_video_resources,
     generate_all_charts,
     generate_combined_wave_chart,
     calculate_satisfaction_score,
     AsyncDeepFaceAnalyzer,
     ThreadedCamera,
-    AsyncCameraInitializer
+    AsyncCameraInitializer,
+    PreprocWorker,
+    InferenceWorker
 )
 from exceptions import CameraOpenError, ModelLoadError
 
@@ -54,6 +59,8 @@ class EmotionAnalysisSystem:
         self.camera_states = {}
         self.video_writers = {}
         self.analyzers = {}  # Async DeepFace analyzers
+        self.preproc_workers = {}  # Keras 輸入預處理執行緒
+        self.inference_worker = None  # 跨鏡頭批次 Keras 推論執行緒
         self.frame_count = 0
         self.exit_by_user = False
         self.previous_results = {
@@ -92,6 +99,9 @@ class EmotionAnalysisSystem:
             # 初始化 Async DeepFace 分析器
             self._initialize_async_analyzers()
 
+            # 初始化 Keras 預處理與批次推論執行緒
+            self._initialize_classification_pipeline()
+
             self.logger.info("系統初始化完成（ThreadedCamera + AsyncDeepFace）")
             return True
             
@@ -139,7 +149,7 @@ class EmotionAnalysisSystem:
                 width=self.config.camera.CAMERA_WIDTH,
                 height=self.config.camera.CAMERA_HEIGHT,
                 fps=self.config.camera.TARGET_FPS,
-                buffer_size=2,
+                buffer_size=1,
                 warmup_frames=5
             )
 
@@ -186,6 +196,12 @@ class EmotionAnalysisSystem:
     
     def _initialize_video_writers(self):
         """初始化視訊寫入器（支援 ThreadedCamera）"""
+        writer_params = None
+        if self.config.video.RECORD_HW_ACCELERATION:
+            writer_params = [
+                cv2.VIDEOWRITER_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY
+            ]
+
         # 建立視訊寫入器
         for name, cam in self.cameras.items():
             # ThreadedCamera 使用屬性，cv2.VideoCapture 使用 get()
@@ -204,7 +220,9 @@ class EmotionAnalysisSystem:
             self.video_writers[name] = create_video_writer(
                 filename,
                 self.config.camera.TARGET_FPS,
-                (width, height)
+                (width, height),
+                fourcc_code=self.config.video.RECORD_FOURCC,
+                params=writer_params
             )
         
         self.logger.info("視訊錄製初始化完成")
@@ -221,7 +239,11 @@ class EmotionAnalysisSystem:
                 frame_skip=5,  # 每 5 幀分析一次
                 input_width=320,  # 降採樣以提升速度
                 input_height=240,
-                analyze_actions=['emotion', 'age', 'gender']
+                analyze_actions=['emotion', 'age', 'gender'],
+                quantized_model_dir=self.config.analysis.DEEPFACE_QUANTIZED_MODEL_DIR,
+                quantized_precision=self.config.analysis.DEEPFACE_QUANTIZED_PRECISION,
+                compile_models=self.config.analysis.DEEPFACE_COMPILE_MODELS,
+                opencv_threads=self.config.analysis.DEEPFACE_OPENCV_THREADS
             )
 
             # 啟動分析器
@@ -232,13 +254,45 @@ class EmotionAnalysisSystem:
 
         self.logger.info(f"成功啟動 {len(self.analyzers)} 個 async analyzers")
 
-    def process_frame(self, camera_name, frame):
+    def _initialize_classification_pipeline(self):
+        """初始化每個鏡頭的預處理執行緒，以及所有鏡頭共用的批次推論執行緒"""
+        # INT8 模型直接接收 uint8 像素
+        normalize = getattr(self.model, 'input_dtype', np.float32) != np.uint8
+        ready_event = threading.Event()
+
+        for name, camera in self.cameras.items():
+            worker = PreprocWorker(
+                name=name,
+                camera=camera,
+                normalize=normalize,
+                frame_skip=3,  # 每 3 幀進行一次 Keras 分類分析（降低 CPU 負載）
+                ready_event=ready_event
+            )
+            self.preproc_workers[name] = worker
+
+        # 所有鏡頭的張量合併為一個批次，只做一次 Keras 推論
+        self.inference_worker = InferenceWorker(
+            self.model,
+            self.class_names,
+            {name: worker.queue for name, worker in self.preproc_workers.items()},
+            ready_event=ready_event
+        )
+        self.inference_worker.start()
+
+        for worker in self.preproc_workers.values():
+            worker.start()
+
+        self.logger.info(f"成功啟動 {len(self.preproc_workers)} 個預處理執行緒與批次推論執行緒")
+
+    def process_frame(self, camera_name, frame, class_name, confidence):
         """
         處理單一攝影機的畫面（使用 Async DeepFace 分析器）
 
         Args:
             camera_name: 攝影機名稱 ('customer' 或 'server')
             frame: 影像幀
+            class_name: Keras 分類結果（由 InferenceWorker 批次取得）
+            confidence: 分類信心分數
 
         Returns:
             處理後的分析結果字典，如果無需分析則返回 None
@@ -246,21 +300,15 @@ class EmotionAnalysisSystem:
         """
         state = self.camera_states[camera_name]
         analyzer = self.analyzers[camera_name]
-
-        # 進行快速分類（Keras，非阻塞）
-        class_name, confidence = classify_frame(
-            frame,
-            self.model,
-            self.class_names
-        )
+        now = time.monotonic()
 
         # 檢查是否偵測到人（Class 1）
         if class_name == 'Class 1':
             # 檢查信心度
             if confidence < 1.0:
                 if state.low_confidence_start is None:
-                    state.low_confidence_start = time.time()
-                elif (time.time() - state.low_confidence_start) > 3:
+                    state.low_confidence_start = now
+                elif (now - state.low_confidence_start) > 3:
                     self.logger.warning(
                         f"{camera_name}: 信心度低於 100% 超過 3 秒，停止分析"
                     )
@@ -271,7 +319,7 @@ class EmotionAnalysisSystem:
             # 標記偵測到人
             if not state.person_detected:
                 state.person_detected = True
-                state.detection_start_time = time.time()
+                state.detection_start_time = now
                 self.logger.info(f"{camera_name}: 偵測到人物")
 
             state.session_end_detected = False
@@ -280,7 +328,7 @@ class EmotionAnalysisSystem:
             # 偵測到會話結束標記
             if not state.session_end_detected:
                 state.session_end_detected = True
-                state.session_end_start_time = time.time()
+                state.session_end_start_time = now
                 self.logger.info(f"{camera_name}: 偵測到會話結束標記")
 
             state.person_detected = False
@@ -292,7 +340,7 @@ class EmotionAnalysisSystem:
 
         # 如果偵測到人且超過延遲時間，提交到 async analyzer
         if state.person_detected and state.detection_start_time:
-            elapsed = time.time() - state.detection_start_time
+            elapsed = now - state.detection_start_time
 
             if elapsed > self.config.analysis.PRESENCE_DETECTION_DELAY_SEC:
                 # 提交影格到 async analyzer（非阻塞）
@@ -305,7 +353,7 @@ class EmotionAnalysisSystem:
             # 處理結果中的人口統計資訊
             if result.get('age') and result.get('gender'):
                 # 判斷是否需要快取人口統計資訊
-                include_demographics = state.should_analyze_demographics(time.time())
+                include_demographics = state.should_analyze_demographics(now)
 
                 if include_demographics:
                     # 快取人口統計資訊（前 8 秒）
@@ -325,12 +373,40 @@ class EmotionAnalysisSystem:
 
         return None
     
+    def _log_pipeline_stats(self):
+        """記錄攝影機與分類管線的效能統計（用於調整佇列與 buffer 大小）"""
+        for name, camera in self.cameras.items():
+            stats = camera.get_stats()
+            self.logger.info(
+                "%s camera: fps=%.1f read_latency=%.1fms dropped=%d seq_gap=%d alive=%s",
+                name, stats['fps'], stats['avg_read_latency_ms'],
+                stats['dropped_frames'], stats['seq_gap'], stats['thread_alive']
+            )
+
+        for name, worker in self.preproc_workers.items():
+            stats = worker.get_statistics()
+            self.logger.info(
+                "%s preproc: processed=%d dropped=%d queue=%d avg=%.2fms",
+                name, stats['processed_frames'], stats['dropped_frames'],
+                stats['queue_depth'], stats['average_preprocess_time'] * 1000
+            )
+
+        if self.inference_worker:
+            stats = self.inference_worker.get_statistics()
+            self.logger.info(
+                "inference: batches=%d failed=%d avg_batch=%.2f avg=%.2fms cache_hits=%d",
+                stats['total_batches'], stats['failed_batches'],
+                stats['average_batch_size'], stats['average_inference_time'] * 1000,
+                stats['cache_hits']
+            )
+
     def should_exit(self):
         """判斷是否應該退出主循環"""
         # 檢查兩個攝影機的會話結束狀態
+        now = time.monotonic()
         for name, state in self.camera_states.items():
             if state.session_end_detected and state.session_end_start_time:
-                if (time.time() - state.session_end_start_time) > 3:
+                if (now - state.session_end_start_time) > 3:
                     self.logger.info(f"{name}: Class 2 持續超過 3 秒，結束分析")
                     return True
         
@@ -366,20 +442,26 @@ class EmotionAnalysisSystem:
                 for name, frame in frames.items():
                     processed_imgs[name] = resize_and_flip_frame(frame)
 
-                # 每 3 幀進行一次 Keras 分類分析（降低 CPU 負載）
+                # 取出推論執行緒已完成的分類結果（非阻塞）
                 # AsyncDeepFaceAnalyzer 會自動處理 frame skipping (每 5 幀)
-                if self.frame_count % 3 == 0:
-                    for name, frame in frames.items():
-                        result = self.process_frame(name, frame)
-                        if result == 'stop':
-                            # 如果任一鏡頭要求停止，則整個系統停止 (可根據需求調整)
-                            self.exit_by_user = True # 標記為正常退出
-                            break
-                        elif result:
-                            self.previous_results[name] = result
-
-                    if self.exit_by_user:
+                for name in frames:
+                    classification = self.inference_worker.get_result(name)
+                    if not classification:
+                        continue
+
+                    _, class_name, confidence = classification
+                    result = self.process_frame(
+                        name, frames[name], class_name, confidence
+                    )
+                    if result == 'stop':
+                        # 如果任一鏡頭要求停止，則整個系統停止 (可根據需求調整)
+                        self.exit_by_user = True # 標記為正常退出
                         break
+                    elif result:
+                        self.previous_results[name] = result
+
+                if self.exit_by_user:
+                    break
                 
                 # 繪製結果與寫入視訊
                 for name, img in processed_imgs.items():
@@ -417,6 +499,10 @@ class EmotionAnalysisSystem:
                     break
                 
                 self.frame_count += 1
+                
+                # 定期記錄擷取/預處理/推論統計（約每 10 秒）
+                if self.frame_count % 300 == 0:
+                    self._log_pipeline_stats()
             
             self.logger.info("主循環結束")
             return True
@@ -441,6 +527,15 @@ class EmotionAnalysisSystem:
                 analyzer.stop(timeout=5.0)
                 self.logger.info(f"Async analyzer '{name}' 已停止")
 
+        # 停止預處理與推論執行緒（需在攝影機之前停止）
+        if self.preproc_workers:
+            for name, worker in self.preproc_workers.items():
+                worker.stop()
+            self.logger.info("預處理執行緒已停止")
+
+        if self.inference_worker:
+            self.inference_worker.stop()
+
         # 停止所有 ThreadedCamera
         if self.cameras:
             self.logger.info("停止 ThreadedCamera...")
@@ -464,43 +559,44 @@ class EmotionAnalysisSystem:
         
         # 轉換視訊格式
         self.logger.info("轉換視訊格式...")
-        convert_avi_to_mp4('output_cam0.avi', 'output_cam0.mp4')
-        convert_avi_to_mp4('output_cam1.avi', 'output_cam1.mp4')
+        convert_avi_to_mp4_batch(['output_cam0.avi', 'output_cam1.avi'])
         
-        # 生成圖表
+        # 生成圖表（各鏡頭圖表與合併圖表互不相依，同時生成）
         self.logger.info("生成分析圖表...")
-        
-        # 處理每個鏡頭的圖表
-        for name, state in self.camera_states.items():
-            if state.emotions:
-                camera_display_name = 'Customer' if name == 'customer' else 'Server'
-                generate_all_charts(
-                    state.emotions,
-                    state.ages,
-                    state.genders,
-                    camera_name=camera_display_name,
-                    output_dir=str(Path.cwd())
-                )
-                
-                # 計算分數並顯示
-                score = calculate_satisfaction_score(state.emotions)
-                self.logger.info(f"Here is the Emotion Grade {score} of {camera_display_name}")
-                print(f"Here is the Emotion Grade {score} of {camera_display_name}")
-
-        # 生成合併圖表 (僅在雙鏡頭模式且都有數據時)
         customer_state = self.camera_states.get('customer')
         server_state = self.camera_states.get('server')
         
-        if (customer_state and server_state and 
-            customer_state.emotions and server_state.emotions):
-            generate_combined_wave_chart(
-                customer_state.emotions,
-                server_state.emotions,
-                str(Path.cwd() / 'Customer_Emotion_Wave & Server_Emotion_Wave.jpg'),
-                label1='Customer_Emotion_Wave',
-                label2='Server_Emotion_Wave',
-                title='Combined Emotion Analysis'
-            )
+        with ThreadPoolExecutor(thread_name_prefix='PostChart') as executor:
+            # 處理每個鏡頭的圖表
+            for name, state in self.camera_states.items():
+                if state.emotions:
+                    camera_display_name = 'Customer' if name == 'customer' else 'Server'
+                    executor.submit(
+                        generate_all_charts,
+                        state.emotions,
+                        state.ages,
+                        state.genders,
+                        camera_name=camera_display_name,
+                        output_dir=str(Path.cwd())
+                    )
+                    
+                    # 計算分數並顯示
+                    score = calculate_satisfaction_score(state.emotions)
+                    self.logger.info(f"Here is the Emotion Grade {score} of {camera_display_name}")
+                    print(f"Here is the Emotion Grade {score} of {camera_display_name}")
+
+            # 生成合併圖表 (僅在雙鏡頭模式且都有數據時)
+            if (customer_state and server_state and 
+                customer_state.emotions and server_state.emotions):
+                executor.submit(
+                    generate_combined_wave_chart,
+                    customer_state.emotions,
+                    server_state.emotions,
+                    str(Path.cwd() / 'Customer_Emotion_Wave & Server_Emotion_Wave.jpg'),
+                    label1='Customer_Emotion_Wave',
+                    label2='Server_Emotion_Wave',
+                    title='Combined Emotion Analysis'
+                )
         
         # [Phase 3] Export Analysis Result to JSON
         # 計算分數 (若無數據則為 0)
@@ -108,12 +108,8 @@ def benchmark_async(num_frames: int = 100) -> float:
         analyzer.submit_frame(warmup_frame)
         time.sleep(0.1)
     
-    # Clear queue
-    while not analyzer.result_queue.empty():
-        try:
-            analyzer.result_queue.get_nowait()
-        except:
-            pass
+    # Consume any pending warmup result
+    analyzer.get_result()
     
     print("  Running benchmark...")
     start_time = time.time()
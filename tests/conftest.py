@@ -14,9 +14,12 @@ import pytest
 def mock_model():
     """Mock Keras model for testing."""
     class MockModel:
-        def predict(self, x, verbose=0):
+        def __call__(self, x, training=False):
             import numpy as np
             return np.array([[0.1, 0.9]])  # Mock prediction
+
+        def predict(self, x, verbose=0):
+            return self(x)
     
     return MockModel()
 
@@ -5,7 +5,10 @@ import pytest
 from unittest.mock import patch, Mock
 import numpy as np
 
+from exceptions import AnalysisError, NoFaceDetectedError
 from utils.analysis import (
+    _run_deepface,
+    analyze_frame_with_retry,
     categorize_emotion,
     map_emotion_to_score,
     calculate_emotion_statistics,
@@ -158,3 +161,94 @@ class TestCalculateSatisfactionScore:
         # 最好情況
         best = calculate_satisfaction_score(['happy'] * 10, baseline_score=60)
         assert 0 <= best <= 100
+
+
+class TestAnalyzeFrameWithRetry:
+    """測試 analyze_frame_with_retry 函式"""
+    
+    frame = np.zeros((10, 10, 3), dtype=np.uint8)
+    
+    @patch('utils.analysis.time.sleep')
+    @patch('utils.analysis.analyze_with_demographics')
+    def test_no_face_skips_retries(self, mock_analyze, mock_sleep):
+        """測試找不到人臉時不重試"""
+        mock_analyze.side_effect = NoFaceDetectedError()
+        
+        result = analyze_frame_with_retry(self.frame, 'Class 1', 0.9)
+        
+        assert result is None
+        assert mock_analyze.call_count == 1
+        mock_sleep.assert_not_called()
+    
+    @patch('utils.analysis.time.sleep')
+    @patch('utils.analysis.analyze_with_demographics')
+    def test_transient_error_uses_exponential_backoff(self, mock_analyze, mock_sleep):
+        """測試暫時性錯誤以指數退避重試"""
+        mock_analyze.side_effect = AnalysisError()
+        
+        result = analyze_frame_with_retry(
+            self.frame, 'Class 1', 0.9, max_retries=3, retry_delay=0.5
+        )
+        
+        assert result is None
+        assert mock_analyze.call_count == 3
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [0.5, 1.0]
+    
+    @patch('utils.analysis.time.sleep')
+    @patch('utils.analysis.analyze_emotions_only')
+    def test_retry_then_success(self, mock_analyze, mock_sleep):
+        """測試重試後成功"""
+        mock_analyze.side_effect = [AnalysisError(), {'emotion': 'happy'}]
+        
+        result = analyze_frame_with_retry(
+            self.frame, 'Class 1', 0.9, include_demographics=False
+        )
+        
+        assert result == {'emotion': 'happy'}
+        assert mock_sleep.call_count == 1
+
+
+class TestRunDeepface:
+    """測試 _run_deepface 函式"""
+    
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    
+    @patch('utils.analysis.DeepFace.analyze')
+    def test_face_detected(self, mock_analyze):
+        """測試偵測到人臉時回傳第一張人臉的結果"""
+        face = {
+            'dominant_emotion': 'happy',
+            'face_confidence': 0.93,
+            'region': {'x': 200, 'y': 120, 'w': 160, 'h': 160}
+        }
+        mock_analyze.return_value = [face]
+        
+        assert _run_deepface(self.frame, ['emotion']) is face
+    
+    @patch('utils.analysis.DeepFace.analyze')
+    def test_zero_face_confidence_is_no_face(self, mock_analyze):
+        """測試 enforce_detection=False 時以整張畫面分析的結果視為找不到人臉"""
+        mock_analyze.return_value = [{
+            'dominant_emotion': 'neutral',
+            'face_confidence': 0,
+            'region': {'x': 0, 'y': 0, 'w': 640, 'h': 480}
+        }]
+        
+        with pytest.raises(NoFaceDetectedError):
+            _run_deepface(self.frame, ['emotion'])
+    
+    @patch('utils.analysis.time.sleep')
+    @patch('utils.analysis.DeepFace.analyze')
+    def test_no_face_is_not_retried(self, mock_analyze, mock_sleep):
+        """測試找不到人臉時 analyze_frame_with_retry 只呼叫 DeepFace 一次"""
+        mock_analyze.return_value = [{
+            'dominant_emotion': 'neutral',
+            'face_confidence': 0,
+            'region': {'x': 0, 'y': 0, 'w': 640, 'h': 480}
+        }]
+        
+        result = analyze_frame_with_retry(self.frame, 'Class 1', 0.9)
+        
+        assert result is None
+        assert mock_analyze.call_count == 1
+        mock_sleep.assert_not_called()
@@ -9,6 +9,10 @@ from unittest.mock import Mock, patch
 from utils.classification import (
     preprocess_frame,
     classify_frame,
+    classify_frames_batch,
+    classify_frame_cached,
+    frame_hash,
+    reset_classification_cache,
     is_person_detected,
     is_session_end
 )
@@ -48,6 +52,35 @@ class TestPreprocessFrame:
         result = preprocess_frame(frame, target_size=(128, 128))
         
         assert result.shape == (1, 128, 128, 3)
+    
+    def test_preprocess_frame_into_out(self):
+        """測試寫入呼叫端提供的輸出陣列"""
+        frame = np.random.randint(0, 255, (224, 224, 3), dtype=np.uint8)
+        out = np.empty((224, 224, 3), dtype=np.float32)
+        
+        result = preprocess_frame(frame, out=out)
+        
+        assert result is out
+        assert np.allclose(out, frame / 127.5 - 1, atol=1e-5)
+    
+    def test_preprocess_frame_without_normalize(self):
+        """測試 INT8 模型路徑只縮放、保留 uint8"""
+        frame = np.random.randint(0, 255, (224, 224, 3), dtype=np.uint8)
+        
+        result = preprocess_frame(frame, normalize=False)
+        
+        assert result.shape == (1, 224, 224, 3)
+        assert result.dtype == np.uint8
+        assert np.array_equal(result[0], frame)
+    
+    def test_preprocess_frame_rejects_non_bgr(self):
+        """測試灰階與 BGRA 影像直接報錯，不回傳上一幀的暫存結果"""
+        preprocess_frame(np.zeros((100, 100, 3), dtype=np.uint8))
+        
+        for frame in (np.zeros((100, 100), dtype=np.uint8),
+                      np.zeros((100, 100, 4), dtype=np.uint8)):
+            with pytest.raises(ValueError):
+                preprocess_frame(frame)
 
 
 class TestClassifyFrame:
@@ -58,8 +91,7 @@ class TestClassifyFrame:
         frame = np.random.randint(0, 255, (100, 100, 3), dtype=np.uint8)
         
         # Mock 模型
-        mock_model = Mock()
-        mock_model.predict.return_value = np.array([[0.2, 0.8]])
+        mock_model = Mock(return_value=np.array([[0.2, 0.8]]))
         
         class_names = ['Class 1', 'Class 2']
         
@@ -67,14 +99,14 @@ class TestClassifyFrame:
         
         assert class_name == 'Class 2'
         assert confidence == 0.8
-        assert mock_model.predict.called
+        assert mock_model.called
+        assert mock_model.call_args.kwargs == {'training': False}
     
     def test_classify_frame_class_1(self):
         """測試 Class 1 分類"""
         frame = np.random.randint(0, 255, (100, 100, 3), dtype=np.uint8)
         
-        mock_model = Mock()
-        mock_model.predict.return_value = np.array([[0.95, 0.05]])
+        mock_model = Mock(return_value=np.array([[0.95, 0.05]]))
         
         class_names = ['Class 1', 'Class 2']
         
@@ -84,6 +116,31 @@ class TestClassifyFrame:
         assert confidence == 0.95
 
 
+class TestClassifyFramesBatch:
+    """測試 classify_frames_batch 函式"""
+    
+    def test_batch_single_forward_pass(self):
+        """測試多個影像幀只呼叫一次模型"""
+        frames = [
+            np.random.randint(0, 255, (100, 100, 3), dtype=np.uint8)
+            for _ in range(2)
+        ]
+        
+        mock_model = Mock(return_value=np.array([[0.9, 0.1], [0.3, 0.7]]))
+        
+        class_names = ['Class 1', 'Class 2']
+        
+        results = classify_frames_batch(frames, mock_model, class_names)
+        
+        assert results == [('Class 1', 0.9), ('Class 2', 0.7)]
+        assert mock_model.call_count == 1
+        assert mock_model.call_args.args[0].shape == (2, 224, 224, 3)
+    
+    def test_empty_batch(self):
+        """測試空列表"""
+        assert classify_frames_batch([], Mock(), ['Class 1']) == []
+
+
 class TestIsPersonDetected:
     """測試 is_person_detected 函式"""
     
@@ -117,3 +174,58 @@ class TestIsSessionEnd:
         """測試會話繼續"""
         assert is_session_end('Class 1') is False
         assert is_session_end('Unknown') is False
+
+
+class TestNumbaPreprocess:
+    """測試 Numba 預處理核心"""
+    
+    def test_matches_opencv_linear(self):
+        """測試與 OpenCV 雙線性縮放 + 正規化結果一致"""
+        from utils._preproc_numba import _preproc_224
+        
+        frame = np.random.randint(0, 255, (120, 160, 3), dtype=np.uint8)
+        out = np.empty((224, 224, 3), dtype=np.float32)
+        
+        _preproc_224(frame, out)
+        
+        expected = cv2.resize(frame, (224, 224), interpolation=cv2.INTER_LINEAR) / 127.5 - 1
+        assert np.abs(out - expected).max() <= 1 / 127.5
+
+
+class TestClassifyFrameCached:
+    """測試 classify_frame_cached 函式"""
+    
+    def setup_method(self):
+        reset_classification_cache()
+    
+    def test_hash_ignores_normalization(self):
+        """測試原始畫面與正規化張量的雜湊相同"""
+        frame = np.zeros((224, 224, 3), dtype=np.uint8)
+        frame[:112, :112] = 200
+        frame[112:, 112:] = 90
+        
+        assert frame_hash(frame) == frame_hash(preprocess_frame(frame)[0])
+    
+    def test_unchanged_frame_skips_model(self):
+        """測試相同畫面沿用上次結果"""
+        frame = np.random.randint(0, 255, (100, 100, 3), dtype=np.uint8)
+        mock_model = Mock(return_value=np.array([[0.2, 0.8]]))
+        
+        first = classify_frame_cached('customer', frame, mock_model, ['Class 1', 'Class 2'])
+        second = classify_frame_cached('customer', frame, mock_model, ['Class 1', 'Class 2'])
+        
+        assert first == second == ('Class 2', 0.8)
+        assert mock_model.call_count == 1
+    
+    def test_changed_frame_runs_model(self):
+        """測試畫面改變或不同鏡頭時重新分類"""
+        mock_model = Mock(return_value=np.array([[0.2, 0.8]]))
+        left = np.zeros((100, 100, 3), dtype=np.uint8)
+        left[:, :50] = 255
+        right = left[:, ::-1].copy()
+        
+        classify_frame_cached('customer', left, mock_model, ['Class 1', 'Class 2'])
+        classify_frame_cached('customer', right, mock_model, ['Class 1', 'Class 2'])
+        classify_frame_cached('server', right, mock_model, ['Class 1', 'Class 2'])
+        
+        assert mock_model.call_count == 3
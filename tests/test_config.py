@@ -13,6 +13,19 @@ from exceptions import ConfigurationError
 class TestPathConfig:
     """測試 PathConfig"""
     
+    def test_validate_paths_scans_directories(self, tmp_path):
+        """測試同一目錄的檔案以一次 scandir 檢查存在與否"""
+        (tmp_path / 'keras_model.h5').write_bytes(b'')
+        
+        with patch.object(PathConfig, 'KERAS_MODEL_PATH', tmp_path / 'keras_model.h5'), \
+                patch.object(PathConfig, 'LABELS_PATH', tmp_path / 'labels.txt'), \
+                patch.object(PathConfig, 'FONT_PATH', tmp_path / 'missing' / 'font.ttf'):
+            assert PathConfig.validate_paths() == {
+                'keras_model': True,
+                'labels': False,
+                'font': False,
+            }
+    
     def test_paths_from_env(self):
         """測試從環境變數載入路徑"""
         with patch.dict(os.environ, {
@@ -132,3 +145,16 @@ class TestConfig:
         assert isinstance(config.camera, CameraConfig)
         assert isinstance(config.analysis, AnalysisConfig)
         assert isinstance(config.log, LogConfig)
+    
+    def test_validate_caches_only_success(self):
+        """測試驗證失敗不會被快取，成功後才沿用結果"""
+        missing = [('labels', Path('/missing/labels.txt'))]
+        
+        with patch.object(Config, '_validated', False), \
+                patch.object(PathConfig, 'ensure_output_dirs'), \
+                patch.object(PathConfig, 'get_missing_files', side_effect=[missing, []]) as check:
+            assert Config.validate()[0] is False
+            assert Config.validate() == (True, None)
+            assert Config.validate() == (True, None)
+        
+        assert check.call_count == 2
@@ -5,13 +5,72 @@ import pytest
 import numpy as np
 import cv2
 from unittest.mock import patch, Mock
+from PIL import ImageFont
 
 from utils.display import (
+    _LABEL_ATLAS,
+    draw_analysis_results,
     resize_and_flip_frame,
     create_split_screen
 )
 
 
+class TestDrawAnalysisResults:
+    """測試 draw_analysis_results 函式"""
+    
+    results = {
+        'class_name': 'Class 1',
+        'confidence_score': 90,
+        'emotion': 'happy',
+        'age': 30,
+        'gender': 'Man',
+        'gender_confidence': 99
+    }
+    
+    @patch('utils.display._get_font', return_value=ImageFont.load_default())
+    def test_draws_text_in_place(self, mock_font):
+        """測試文字直接繪製在原影像上"""
+        img = np.full((200, 300, 3), 255, dtype=np.uint8)
+        
+        result = draw_analysis_results(img, self.results)
+        
+        assert result is img
+        assert not np.all(result == 255)
+    
+    @patch('utils.display._get_font', return_value=ImageFont.load_default())
+    def test_labels_rendered_once(self, mock_font):
+        """測試相同文字只點陣化一次，之後從 atlas 取用"""
+        _LABEL_ATLAS.clear()
+        first = draw_analysis_results(
+            np.full((200, 300, 3), 255, dtype=np.uint8), self.results
+        )
+        
+        with patch('utils.display.Image.new') as mock_new:
+            second = draw_analysis_results(
+                np.full((200, 300, 3), 255, dtype=np.uint8), self.results
+            )
+        
+        mock_new.assert_not_called()
+        assert np.array_equal(first, second)
+    
+    @patch('utils.display._get_font', return_value=ImageFont.load_default())
+    def test_changing_values_reuse_glyphs(self, mock_font):
+        """測試數值改變時前綴與字形仍從 atlas 取用，不重新點陣化"""
+        _LABEL_ATLAS.clear()
+        draw_analysis_results(
+            np.full((200, 300, 3), 255, dtype=np.uint8),
+            dict(self.results, confidence_score=12.34, age=56)
+        )
+        
+        with patch('utils.display.Image.new') as mock_new:
+            draw_analysis_results(
+                np.full((200, 300, 3), 255, dtype=np.uint8),
+                dict(self.results, confidence_score=65.43, age=21)
+            )
+        
+        mock_new.assert_not_called()
+
+
 class TestResizeAndFlipFrame:
     """測試 resize_and_flip_frame 函式"""
     
@@ -78,3 +137,16 @@ class TestCreateSplitScreen:
         
         # 下面應該是白色
         assert np.all(result[100:, :, :] == 255)
+    
+    def test_canvas_reused(self):
+        """測試相同版面重複使用預先配置的畫布"""
+        frame1 = np.zeros((50, 60, 3), dtype=np.uint8)
+        frame2 = np.ones((50, 40, 3), dtype=np.uint8)
+        
+        first = create_split_screen(frame1, frame2)
+        second = create_split_screen(frame1 + 2, frame2 + 2)
+        
+        assert second is first
+        assert second.shape == (50, 100, 3)
+        assert np.all(second[:, :60] == 2)
+        assert np.all(second[:, 60:] == 3)
@@ -0,0 +1,131 @@
+"""
+測試 pipeline 模組
+"""
+import queue
+import threading
+import time
+import pytest
+import numpy as np
+from unittest.mock import Mock
+
+from utils.classification import reset_classification_cache
+from utils.pipeline import PreprocWorker, InferenceWorker
+
+
+class FakeCamera:
+    """每次 read_new 都回傳一個新幀的假攝影機"""
+    
+    def __init__(self, max_frames=20):
+        self.running = True
+        self.max_frames = max_frames
+        self.seq = 0
+    
+    def read_new(self, last_seq, timeout=None):
+        if self.seq >= self.max_frames:
+            self.running = False
+            time.sleep(0.01)
+            return False, None, self.seq
+        self.seq += 1
+        frame = np.full((48, 64, 3), self.seq, dtype=np.uint8)
+        return True, frame, self.seq
+
+
+def wait_for(worker, processed, timeout=2.0):
+    """等待預處理執行緒處理完指定幀數"""
+    deadline = time.time() + timeout
+    while worker.processed_frames < processed and time.time() < deadline:
+        time.sleep(0.01)
+
+
+class TestPreprocWorker:
+    """測試 PreprocWorker 類別"""
+    
+    def test_queue_keeps_latest_tensors(self):
+        """測試佇列已滿時丟棄最舊的張量"""
+        worker = PreprocWorker('test', FakeCamera(max_frames=10), queue_size=2)
+        worker.start()
+        wait_for(worker, 10)
+        worker.stop()
+        
+        seq1, tensor1 = worker.get()
+        seq2, tensor2 = worker.get()
+        
+        assert (seq1, seq2) == (9, 10)
+        assert tensor1.shape == (1, 224, 224, 3)
+        assert tensor1 is not tensor2
+        assert worker.get() is None
+        assert worker.get_statistics()['dropped_frames'] == 8
+    
+    def test_frame_skip(self):
+        """測試每隔 frame_skip 幀才預處理"""
+        worker = PreprocWorker(
+            'test', FakeCamera(max_frames=9), frame_skip=3, queue_size=3
+        )
+        worker.start()
+        wait_for(worker, 3)
+        worker.stop()
+        
+        assert [worker.get()[0] for _ in range(3)] == [3, 6, 9]
+    
+    def test_uint8_output_without_normalize(self):
+        """測試 INT8 模型路徑輸出 uint8 張量"""
+        worker = PreprocWorker('test', FakeCamera(max_frames=1), normalize=False)
+        worker.start()
+        wait_for(worker, 1)
+        worker.stop()
+        
+        seq, tensor = worker.get()
+        
+        assert tensor.dtype == np.uint8
+        assert np.all(tensor == 1)
+
+
+class TestInferenceWorker:
+    """測試 InferenceWorker 類別"""
+    
+    def setup_method(self):
+        reset_classification_cache()
+    
+    def test_batches_latest_tensor_per_camera(self):
+        """測試各鏡頭最新張量合併成一次推論並依鏡頭分送結果"""
+        input_qs = {'customer': queue.Queue(), 'server': queue.Queue()}
+        input_qs['customer'].put((1, np.zeros((1, 224, 224, 3), np.float32)))
+        input_qs['customer'].put((2, np.zeros((1, 224, 224, 3), np.float32)))
+        input_qs['server'].put((5, np.zeros((1, 224, 224, 3), np.float32)))
+        
+        model = Mock(return_value=np.array([[0.9, 0.1], [0.2, 0.8]]))
+        ready = threading.Event()
+        worker = InferenceWorker(model, ['Class 1', 'Class 2'], input_qs, ready_event=ready)
+        worker.start()
+        ready.set()
+        
+        deadline = time.time() + 2.0
+        while worker.total_batches == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        worker.stop()
+        
+        assert model.call_count == 1
+        assert model.call_args.args[0].shape == (2, 224, 224, 3)
+        assert worker.get_result('customer') == (2, 'Class 1', 0.9)
+        assert worker.get_result('server') == (5, 'Class 2', 0.8)
+        assert worker.get_result('server') is None
+    
+    def test_unchanged_scene_reuses_result(self):
+        """測試畫面未變的鏡頭沿用上次結果，不再送入模型"""
+        input_qs = {'customer': queue.Queue()}
+        model = Mock(return_value=np.array([[0.9, 0.1]]))
+        ready = threading.Event()
+        worker = InferenceWorker(model, ['Class 1', 'Class 2'], input_qs, ready_event=ready)
+        worker.start()
+        
+        tensor = np.random.uniform(-1, 1, (1, 224, 224, 3)).astype(np.float32)
+        for seq in (1, 2):
+            input_qs['customer'].put((seq, tensor))
+            ready.set()
+            deadline = time.time() + 2.0
+            while worker.get_result('customer') is None and time.time() < deadline:
+                time.sleep(0.01)
+        worker.stop()
+        
+        assert model.call_count == 1
+        assert worker.get_statistics()['cache_hits'] == 1
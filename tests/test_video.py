@@ -0,0 +1,197 @@
+"""
+測試 video 模組
+"""
+import threading
+import time
+import numpy as np
+from unittest.mock import Mock, patch
+
+from utils.video import (
+    ThreadedVideoWriter,
+    convert_avi_to_mp4,
+    convert_avi_to_mp4_batch,
+    create_video_writer,
+    get_video_info,
+    release_video_resources
+)
+
+
+class TestThreadedVideoWriter:
+    """測試 ThreadedVideoWriter 類別"""
+    
+    def test_release_flushes_queue(self):
+        """測試 release() 寫完佇列中所有影格後才關閉寫入器"""
+        inner = Mock()
+        writer = ThreadedVideoWriter(inner, queue_size=16)
+        frames = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(10)]
+        
+        for frame in frames:
+            writer.write(frame)
+        release_video_resources(writer)
+        
+        assert [call.args[0] for call in inner.write.call_args_list] == frames
+        assert inner.release.call_count == 1
+        assert not writer.isOpened()
+    
+    def test_full_queue_blocks_instead_of_dropping(self):
+        """測試編碼暫時跟不上時 write() 等待佇列空出，不丟棄影格"""
+        inner = Mock()
+        inner.write.side_effect = lambda frame: time.sleep(0.005)
+        writer = ThreadedVideoWriter(inner, queue_size=2)
+        
+        for _ in range(10):
+            writer.write(np.zeros((4, 4, 3), dtype=np.uint8))
+        writer.release()
+        
+        assert writer.dropped_frames == 0
+        assert writer.written_frames == 10
+    
+    def test_stalled_encoder_drops_after_timeout(self):
+        """測試編碼器卡住超過 put_timeout 時才丟棄影格"""
+        gate = threading.Event()
+        inner = Mock()
+        inner.write.side_effect = lambda frame: gate.wait()
+        writer = ThreadedVideoWriter(inner, queue_size=2, put_timeout=0.01)
+        
+        for _ in range(10):
+            writer.write(np.zeros((4, 4, 3), dtype=np.uint8))
+        gate.set()
+        writer.release()
+        
+        assert writer.dropped_frames >= 7
+        assert writer.written_frames + writer.dropped_frames == 10
+    
+    def test_create_video_writer_threaded(self, tmp_path):
+        """測試 create_video_writer 預設回傳背景執行緒寫入器"""
+        writer = create_video_writer(str(tmp_path / 'out.avi'), 30, (64, 48))
+        writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+        writer.release()
+        
+        assert isinstance(writer, ThreadedVideoWriter)
+        assert writer.written_frames == 1
+        assert (tmp_path / 'out.avi').stat().st_size > 0
+
+    
+    def test_cuda_writer_only_for_compatible_codec(self, tmp_path):
+        """測試 GPU 寫入器只用於 H.264/HEVC，不覆寫呼叫端指定的 XVID"""
+        with patch('utils.video._has_cuda_writer', return_value=True), \
+                patch('utils.video.CudaVideoWriter') as cuda_writer:
+            xvid = create_video_writer(
+                str(tmp_path / 'xvid.avi'), 30, (64, 48), 'XVID', threaded=False
+            )
+            h264 = create_video_writer(
+                str(tmp_path / 'h264.mp4'), 30, (64, 48), 'avc1', threaded=False
+            )
+        
+        xvid.release()
+        cuda_writer.assert_called_once_with(str(tmp_path / 'h264.mp4'), 30, (64, 48), 'H264')
+        assert h264 is cuda_writer.return_value
+
+
+class TestGetVideoInfo:
+    """測試 get_video_info 函式"""
+    
+    def test_reads_probe_metadata(self):
+        """測試由 ffprobe 中繼資料組出資訊，缺少 nb_frames 時由長度推算"""
+        probe = {
+            'streams': [{'width': 640, 'height': 480, 'r_frame_rate': '30000/1001'}],
+            'format': {'duration': '10.010000'}
+        }
+        
+        with patch('utils.video.ffmpeg.probe', return_value=probe):
+            info = get_video_info('session.avi')
+        
+        assert info['width'] == 640
+        assert info['height'] == 480
+        assert abs(info['fps'] - 29.97) < 0.01
+        assert info['frame_count'] == 300
+        assert info['duration'] == 10.01
+    
+    def test_unknown_frame_rate_falls_back(self):
+        """測試 r_frame_rate 為 '0/0' 時改用 avg_frame_rate，都未知時為 0"""
+        probe = {
+            'streams': [{'width': 640, 'height': 480, 'r_frame_rate': '0/0',
+                         'avg_frame_rate': '25/1', 'nb_frames': '250'}],
+            'format': {'duration': '10.0'}
+        }
+        
+        with patch('utils.video.ffmpeg.probe', return_value=probe):
+            assert get_video_info('session.avi')['fps'] == 25.0
+        
+        probe['streams'][0]['avg_frame_rate'] = '0/0'
+        with patch('utils.video.ffmpeg.probe', return_value=probe):
+            info = get_video_info('session.avi')
+        
+        assert info['fps'] == 0.0
+        assert info['frame_count'] == 250
+    
+    def test_no_video_stream(self):
+        """測試沒有視訊串流時返回 None"""
+        with patch('utils.video.ffmpeg.probe', return_value={'streams': [], 'format': {}}):
+            assert get_video_info('audio_only.avi') is None
+
+
+class TestConvertAviToMp4:
+    """測試 convert_avi_to_mp4 函式"""
+    
+    def test_h264_input_is_stream_copied(self, tmp_path):
+        """測試 H.264 輸入只重新封裝，不重新編碼"""
+        source = tmp_path / 'session.avi'
+        source.write_bytes(b'avi')
+        probe = {'streams': [{'codec_type': 'video', 'codec_name': 'h264',
+                              'width': 640, 'height': 480, 'r_frame_rate': '30/1'}]}
+        
+        with patch('utils.video.ffmpeg.probe', return_value=probe), \
+                patch('utils.video._remux') as remux, \
+                patch('utils.video._transcode') as transcode:
+            assert convert_avi_to_mp4(str(source))
+        
+        remux.assert_called_once_with(str(source), str(tmp_path / 'session.mp4'))
+        transcode.assert_not_called()
+    
+    def test_xvid_input_is_transcoded(self, tmp_path):
+        """測試 MPEG-4 (XVID) 輸入需要重新編碼"""
+        source = tmp_path / 'session.avi'
+        source.write_bytes(b'avi')
+        probe = {
+            'streams': [
+                {'codec_type': 'video', 'codec_name': 'mpeg4',
+                 'width': 640, 'height': 480, 'r_frame_rate': '30/1'},
+                {'codec_type': 'audio', 'codec_name': 'pcm_s16le'}
+            ],
+            'format': {'duration': '12.0'}
+        }
+        
+        with patch('utils.video.ffmpeg.probe', return_value=probe) as mock_probe, \
+                patch('utils.video.HAS_PYNVC', False), \
+                patch('utils.video._has_nvenc', return_value=False), \
+                patch('utils.video._remux') as remux, \
+                patch('utils.video._transcode') as transcode:
+            assert convert_avi_to_mp4(str(source))
+        
+        # 編碼判斷與轉碼參數共用同一次 ffprobe 結果
+        assert mock_probe.call_count == 1
+        remux.assert_not_called()
+        transcode.assert_called_once()
+        info = transcode.call_args.kwargs['info']
+        assert (info['fps'], info['duration']) == (30.0, 12.0)
+    
+    def test_batch_probes_each_file_once(self, tmp_path):
+        """測試批次轉檔時每個檔案只執行一次 ffprobe"""
+        sources = []
+        for name in ('customer.avi', 'server.avi'):
+            source = tmp_path / name
+            source.write_bytes(b'avi')
+            sources.append(str(source))
+        probe = {'streams': [{'codec_type': 'video', 'codec_name': 'mpeg4',
+                              'width': 640, 'height': 480, 'r_frame_rate': '30/1'}]}
+        
+        with patch('utils.video.ffmpeg.probe', return_value=probe) as mock_probe, \
+                patch('utils.video.HAS_PYNVC', False), \
+                patch('utils.video._has_nvenc', return_value=False), \
+                patch('utils.video._transcode') as transcode:
+            results = convert_avi_to_mp4_batch(sources, concurrency=2)
+        
+        assert results == dict.fromkeys(sources, True)
+        assert sorted(c.args[0] for c in mock_probe.call_args_list) == sorted(sources)
+        assert transcode.call_count == 2
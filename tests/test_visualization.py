@@ -0,0 +1,112 @@
+"""
+測試 visualization 模組
+"""
+import numpy as np
+
+from utils.analysis import map_emotion_to_score
+from utils.visualization import (
+    _emotion_scores,
+    _figures,
+    _get_axes,
+    generate_all_charts,
+    generate_demographics_title,
+    generate_emotion_bar_chart,
+    generate_emotion_wave_chart
+)
+
+
+class TestEmotionScores:
+    """測試情緒分數查找表"""
+    
+    def test_matches_map_emotion_to_score(self):
+        """測試查表結果與逐一呼叫 map_emotion_to_score 相同"""
+        emotions = ['happy', 'sad', 'neutral', 'angry', 'surprise', 'fear', 'disgust']
+        
+        scores = _emotion_scores(emotions)
+        
+        assert scores.tolist() == [map_emotion_to_score(e) for e in emotions]
+    
+    def test_unknown_emotion_is_neutral(self):
+        """測試未知情緒映射為中性"""
+        assert _emotion_scores(['happy', 'confused']).tolist() == [1, 0]
+
+
+class TestGenerateEmotionBarChart:
+    """測試 generate_emotion_bar_chart 函式"""
+    
+    def test_bar_heights_are_category_proportions(self, tmp_path):
+        """測試長條高度為負面/中性/正面的比例"""
+        emotions = ['happy', 'happy', 'sad', 'neutral', 'fear', 'confused', 'surprise', 'angry']
+        
+        assert generate_emotion_bar_chart(emotions, str(tmp_path / 'bar.jpg'), figsize=(8, 4))
+        
+        _, ax = _figures.figures[(8, 4)]
+        heights = [patch.get_height() for patch in ax.patches]
+        assert np.allclose(heights, [2 / 8, 3 / 8, 3 / 8])
+        assert (tmp_path / 'bar.jpg').exists()
+
+
+class TestFigureReuse:
+    """測試 Figure 重複使用"""
+    
+    def test_same_figure_cleared_between_charts(self, tmp_path):
+        """測試同尺寸圖表共用 Figure，且每次繪製前清空"""
+        generate_emotion_wave_chart(['happy', 'sad'], str(tmp_path / 'a.jpg'), figsize=(10, 5))
+        fig, ax = _figures.figures[(10, 5)]
+        generate_emotion_wave_chart(['neutral'] * 3, str(tmp_path / 'b.jpg'), figsize=(10, 5))
+        
+        assert _figures.figures[(10, 5)][0] is fig
+        assert len(ax.lines) == 2  # 情緒曲線 + 零線
+        assert ax.lines[0].get_ydata().tolist() == [0, 0, 0]
+        
+        new_fig, _ = _get_axes((6, 3))
+        assert new_fig is not fig
+
+
+class TestGenerateDemographicsTitle:
+    """測試 generate_demographics_title 函式"""
+    
+    def test_title_contents(self):
+        """測試平均年齡、最常見性別與平均信心度"""
+        title = generate_demographics_title(
+            [30, 31, 35],
+            [('Man', 90.0), ('Woman', 60.0), ('Man', 99.0)]
+        )
+        
+        assert title == "Emotion Analysis (Avg Age: 32, Gender: Man 83.00%)"
+    
+    def test_empty_input(self):
+        """測試沒有資料時使用預設標題"""
+        assert generate_demographics_title([], []) == "Emotion Analysis"
+
+
+class TestPlotWave:
+    """測試長序列降採樣"""
+    
+    def test_long_sequence_is_block_averaged(self, tmp_path):
+        """測試超過點數上限時以區塊平均繪製，x 軸仍為影格編號"""
+        emotions = ['happy', 'happy', 'happy', 'happy', 'sad'] * 2000  # 10000 幀
+        
+        generate_emotion_wave_chart(emotions, str(tmp_path / 'wave.jpg'), figsize=(10, 5))
+        
+        _, ax = _figures.figures[(10, 5)]
+        line = ax.lines[0]
+        assert len(line.get_xdata()) == 2000
+        assert line.get_xdata()[1] == 5
+        assert np.allclose(line.get_ydata(), 0.6)  # (1 + 1 + 1 + 1 - 1) / 5
+
+
+class TestGenerateAllCharts:
+    """測試 generate_all_charts 函式"""
+    
+    def test_svg_output(self, tmp_path):
+        """測試 raster=False 輸出 SVG 向量圖"""
+        assert generate_all_charts(
+            ['happy', 'sad', 'neutral'], [30], [('Man', 90.0)],
+            camera_name='Customer', output_dir=str(tmp_path), raster=False
+        )
+        
+        wave = tmp_path / 'Customer_Emotion_Wave.svg'
+        assert wave.read_text().lstrip().startswith('<?xml')
+        assert '<dc:date>' not in wave.read_text()
+        assert (tmp_path / 'Customer_Emotion_Bar.svg').exists()
@@ -3,7 +3,7 @@
 
 提供情緒分析系統所需的各種工具功能。
 """
-from .logging_config import setup_logging, get_logger
+from .logging_config import setup_logging, shutdown_logging, get_logger
 from .camera import (
     open_camera_with_retry,
     configure_camera,
@@ -15,6 +15,11 @@ from .model import load_keras_model, validate_model
 from .classification import (
     preprocess_frame,
     classify_frame,
+    classify_frames_batch,
+    classify_tensors,
+    classify_frame_cached,
+    frame_hash,
+    reset_classification_cache,
     is_person_detected,
     is_session_end
 )
@@ -29,15 +34,19 @@ from .analysis import (
 )
 from .async_analysis import AsyncDeepFaceAnalyzer
 from .threaded_camera import ThreadedCamera, AsyncCameraInitializer
+from .pipeline import PreprocWorker, InferenceWorker
 from .display import (
     put_text_chinese,
+    put_texts_chinese,
     draw_analysis_results,
     resize_and_flip_frame,
     create_split_screen
 )
 from .video import (
+    ThreadedVideoWriter,
     create_video_writer,
     convert_avi_to_mp4,
+    convert_avi_to_mp4_batch,
     release_video_resources,
     get_video_info
 )
@@ -56,6 +65,7 @@ from .camera_processing import (
 __all__ = [
     # Logging
     'setup_logging',
+    'shutdown_logging',
     'get_logger',
     
     # Camera
@@ -72,6 +82,11 @@ __all__ = [
     # Classification
     'preprocess_frame',
     'classify_frame',
+    'classify_frames_batch',
+    'classify_tensors',
+    'classify_frame_cached',
+    'frame_hash',
+    'reset_classification_cache',
     'is_person_detected',
     'is_session_end',
     
@@ -89,15 +104,22 @@ __all__ = [
     'ThreadedCamera',
     'AsyncCameraInitializer',
     
+    # Pipeline
+    'PreprocWorker',
+    'InferenceWorker',
+    
     # Display
     'put_text_chinese',
+    'put_texts_chinese',
     'draw_analysis_results',
     'resize_and_flip_frame',
     'create_split_screen',
     
     # Video
+    'ThreadedVideoWriter',
     'create_video_writer',
     'convert_avi_to_mp4',
+    'convert_avi_to_mp4_batch',
     'release_video_resources',
     'get_video_info',
     
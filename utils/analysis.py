@@ -3,6 +3,7 @@
 
 提供使用 DeepFace 進行情緒、年齡、性別分析的功能。
 """
+import logging
 import time
 import numpy as np
 from typing import Optional, Dict, Any, List
@@ -10,16 +11,68 @@ from deepface import DeepFace
 
 from config import Config
 from utils.logging_config import get_logger
-from exceptions import AnalysisError
+from exceptions import AnalysisError, NoFaceDetectedError
 
 logger = get_logger(__name__)
 
+# 情緒 -> 類別 反查表（模組載入時建立一次）
+EMOTION_TO_CATEGORY = {
+    **dict.fromkeys(['happy', 'surprise'], 'positive'),
+    **dict.fromkeys(['angry', 'sad'], 'negative'),
+    **dict.fromkeys(['neutral', 'disgust', 'fear'], 'neutral'),
+}
+
+
+def _run_deepface(frame: np.ndarray, actions: List[str]) -> Dict[str, Any]:
+    """
+    執行 DeepFace 分析並將錯誤分類
+    
+    Args:
+        frame: 影像幀
+        actions: DeepFace 分析項目
+        
+    Returns:
+        第一張人臉的分析結果
+        
+    Raises:
+        NoFaceDetectedError: 影像中找不到人臉（重試無效）
+        AnalysisError: 其他分析失敗（可能是暫時性錯誤）
+    """
+    try:
+        analyze_result = DeepFace.analyze(
+            frame,
+            actions=actions,
+            enforce_detection=False
+        )
+    except ValueError as e:
+        if 'face could not be detected' in str(e).lower():
+            raise NoFaceDetectedError(str(e)) from e
+        raise AnalysisError(f"DeepFace analysis failed: {e}") from e
+    except Exception as e:
+        raise AnalysisError(f"DeepFace analysis failed: {e}") from e
+    
+    if not analyze_result:
+        raise NoFaceDetectedError()
+    
+    # enforce_detection=False 時找不到人臉不會拋出例外，而是以整張影像分析並
+    # 回報 face_confidence 0（區域即整個畫面），視同找不到人臉
+    analysis = analyze_result[0]
+    region = analysis.get('region') or {}
+    height, width = frame.shape[:2]
+    if analysis.get('face_confidence') == 0 or (
+        region.get('x') == 0 and region.get('y') == 0
+        and region.get('w') == width and region.get('h') == height
+    ):
+        raise NoFaceDetectedError()
+    
+    return analysis
+
 
 def analyze_with_demographics(
     frame: np.ndarray,
     class_name: str,
     confidence_score: float
-) -> Optional[Dict[str, Any]]:
+) -> Dict[str, Any]:
     """
     分析影像的情緒、年齡和性別
     
@@ -29,54 +82,55 @@ def analyze_with_demographics(
         confidence_score: 分類信心分數
         
     Returns:
-        包含分析結果的字典，如果分析失敗則返回 None
+        包含分析結果的字典
+        
+    Raises:
+        NoFaceDetectedError: 影像中找不到人臉
+        AnalysisError: 其他分析失敗
+        
+    注意：失敗時拋出例外而非返回 None（舊版行為）；需要 None 語意的
+    呼叫端請改用 analyze_frame_with_retry。
         
     Example:
         >>> result = analyze_with_demographics(frame, 'Class 1', 0.95)
         >>> print(result['emotion'], result['age'], result['gender'])
     """
+    analysis = _run_deepface(frame, ['emotion', 'age', 'gender'])
+    
     try:
-        # 使用 DeepFace 分析
-        analyze_result = DeepFace.analyze(
-            frame,
-            actions=['emotion', 'age', 'gender'],
-            enforce_detection=False
-        )
-        
         # 提取結果
-        emotion = analyze_result[0]['dominant_emotion']
-        age = round(analyze_result[0]['age'])
+        emotion = analysis['dominant_emotion']
+        age = round(analysis['age'])
         
-        gender_prob = analyze_result[0]['gender']
+        gender_prob = analysis['gender']
         gender = max(gender_prob, key=gender_prob.get)
         gender_confidence = round(gender_prob[gender], 2)
-        
-        result = {
-            'class_name': class_name,
-            'confidence_score': np.round(confidence_score * 100, 2),
-            'emotion': emotion,
-            'age': age,
-            'gender': gender,
-            'gender_confidence': gender_confidence
-        }
-        
+    except (KeyError, TypeError, ValueError) as e:
+        raise AnalysisError(f"Unexpected DeepFace result: {e}") from e
+    
+    result = {
+        'class_name': class_name,
+        'confidence_score': np.round(confidence_score * 100, 2),
+        'emotion': emotion,
+        'age': age,
+        'gender': gender,
+        'gender_confidence': gender_confidence
+    }
+    
+    if logger.isEnabledFor(logging.DEBUG):
         logger.debug(
-            f"Demographics analysis: emotion={emotion}, age={age}, "
-            f"gender={gender} ({gender_confidence}%)"
+            "Demographics analysis: emotion=%s, age=%s, gender=%s (%s%%)",
+            emotion, age, gender, gender_confidence
         )
-        
-        return result
-        
-    except Exception as e:
-        logger.error(f"Error in demographics analysis: {e}", exc_info=True)
-        return None
+    
+    return result
 
 
 def analyze_emotions_only(
     frame: np.ndarray,
     class_name: str,
     confidence_score: float
-) -> Optional[Dict[str, Any]]:
+) -> Dict[str, Any]:
     """
     僅分析情緒（不分析年齡和性別）
     
@@ -86,31 +140,32 @@ def analyze_emotions_only(
         confidence_score: 分類信心分數
         
     Returns:
-        包含情緒分析結果的字典，如果分析失敗則返回 None
-    """
-    try:
-        # 使用 DeepFace 僅分析情緒
-        analyze_result = DeepFace.analyze(
-            frame,
-            actions=['emotion'],
-            enforce_detection=False
-        )
+        包含情緒分析結果的字典
         
-        emotion = analyze_result[0]['dominant_emotion']
-        
-        result = {
-            'class_name': class_name,
-            'confidence_score': np.round(confidence_score * 100, 2),
-            'emotion': emotion
-        }
+    Raises:
+        NoFaceDetectedError: 影像中找不到人臉
+        AnalysisError: 其他分析失敗
         
-        logger.debug(f"Emotion-only analysis: {emotion}")
-        
-        return result
-        
-    except Exception as e:
-        logger.error(f"Error in emotion analysis: {e}", exc_info=True)
-        return None
+    注意：失敗時拋出例外而非返回 None（舊版行為）；需要 None 語意的
+    呼叫端請改用 analyze_frame_with_retry。
+    """
+    analysis = _run_deepface(frame, ['emotion'])
+    
+    try:
+        emotion = analysis['dominant_emotion']
+    except (KeyError, TypeError) as e:
+        raise AnalysisError(f"Unexpected DeepFace result: {e}") from e
+    
+    result = {
+        'class_name': class_name,
+        'confidence_score': np.round(confidence_score * 100, 2),
+        'emotion': emotion
+    }
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Emotion-only analysis: %s", emotion)
+    
+    return result
 
 
 def analyze_frame_with_retry(
@@ -124,13 +179,16 @@ def analyze_frame_with_retry(
     """
     帶重試機制的影像分析
     
+    找不到人臉時立即放棄（同一幀重試結果不會改變）；
+    其他錯誤以指數退避重試 (retry_delay * 2**attempt)。
+    
     Args:
         frame: 影像幀
         class_name: 分類名稱
         confidence_score: 分類信心分數
         include_demographics: 是否包含年齡和性別分析
         max_retries: 最大重試次數
-        retry_delay: 重試延遲（秒）
+        retry_delay: 初始重試延遲（秒）
         
     Returns:
         分析結果字典，失敗則返回 None
@@ -141,19 +199,21 @@ def analyze_frame_with_retry(
     )
     
     for attempt in range(max_retries):
-        result = analyze_func(frame, class_name, confidence_score)
-        
-        if result is not None:
-            return result
-            
-        if attempt < max_retries - 1:
-            logger.warning(
-                f"Analysis attempt {attempt + 1} failed, "
-                f"retrying in {retry_delay}s..."
-            )
-            time.sleep(retry_delay)
-    
-    logger.error(f"Analysis failed after {max_retries} attempts")
+        try:
+            return analyze_func(frame, class_name, confidence_score)
+        except NoFaceDetectedError as e:
+            logger.debug("No face detected, skipping retries: %s", e)
+            return None
+        except AnalysisError as e:
+            if attempt < max_retries - 1:
+                delay = retry_delay * (2 ** attempt)
+                logger.warning(
+                    "Analysis attempt %d failed (%s), retrying in %ss...",
+                    attempt + 1, e, delay
+                )
+                time.sleep(delay)
+    
+    logger.error("Analysis failed after %d attempts", max_retries)
     return None
 
 
@@ -167,17 +227,11 @@ def categorize_emotion(emotion: str) -> str:
     Returns:
         情緒類別: 'positive', 'negative', 或 'neutral'
     """
-    emotion_categories = {
-        'positive': ['happy', 'surprise'],
-        'negative': ['angry', 'sad'],
-        'neutral': ['neutral', 'disgust', 'fear']
-    }
-    
-    for category, emotions in emotion_categories.items():
-        if emotion in emotions:
-            return category
+    category = EMOTION_TO_CATEGORY.get(emotion)
+    if category is not None:
+        return category
     
-    logger.warning(f"Unknown emotion: {emotion}, categorizing as neutral")
+    logger.warning("Unknown emotion: %s, categorizing as neutral", emotion)
     return 'neutral'
 
 
@@ -279,10 +333,11 @@ def calculate_satisfaction_score(
     )
     
     logger.info(
-        f"Satisfaction score: {score:.1f} "
-        f"(P:{stats['positive_percentage']:.0%}, "
-        f"N:{stats['negative_percentage']:.0%}, "
-        f"Ne:{stats['neutral_percentage']:.0%})"
+        "Satisfaction score: %.1f (P:%.0f%%, N:%.0f%%, Ne:%.0f%%)",
+        score,
+        stats['positive_percentage'] * 100,
+        stats['negative_percentage'] * 100,
+        stats['neutral_percentage'] * 100
     )
     
     return round(score, 1)
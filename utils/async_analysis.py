@@ -10,6 +10,8 @@ Phase 5: Key Performance Optimizations:
 - Image downsampling before analysis
 - Fast detector backend (opencv)
 - Metal GPU memory growth configuration for macOS
+- Optional FP16/INT8 TFLite attribute models (see export_quantized_models)
+- Optional XLA-compiled (tf.function) Keras attribute models
 """
 
 import threading
@@ -17,13 +19,74 @@ import queue
 import time
 import logging
 import platform
-from typing import Optional, Dict, Any, Tuple
+from collections import deque
+from functools import partial
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple, Callable
 import cv2
 import numpy as np
 from deepface import DeepFace
+from deepface.modules import preprocessing
 
 logger = logging.getLogger(__name__)
 
+# DeepFace attribute model names per analysis action
+QUANTIZED_MODEL_NAMES = {
+    'emotion': 'Emotion',
+    'age': 'Age',
+    'gender': 'Gender',
+}
+
+# Output label order of the DeepFace attribute models
+EMOTION_LABELS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+GENDER_LABELS = ['Woman', 'Man']
+
+
+def quantized_model_path(model_dir, action: str, precision: str = 'fp16') -> Path:
+    """Return the expected TFLite file path for an action, e.g. emotion_fp16.tflite."""
+    return Path(model_dir) / f"{action}_{precision}.tflite"
+
+
+def export_quantized_models(
+    output_dir,
+    actions: list = None,
+    precision: str = 'fp16'
+) -> Dict[str, Path]:
+    """
+    Convert DeepFace's FP32 Keras attribute models to TFLite (one-time step).
+
+    Args:
+        output_dir: Directory to write the .tflite files into
+        actions: Actions to convert (default: emotion, age, gender)
+        precision: 'fp16' (float16 weights) or 'int8' (dynamic range quantization)
+
+    Returns:
+        Mapping of action to written file path
+    """
+    import tensorflow as tf
+
+    if precision not in ('fp16', 'int8'):
+        raise ValueError(f"Unsupported precision: {precision}")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    written = {}
+    for action in actions or list(QUANTIZED_MODEL_NAMES):
+        keras_model = DeepFace.build_model(QUANTIZED_MODEL_NAMES[action]).model
+
+        converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if precision == 'fp16':
+            converter.target_spec.supported_types = [tf.float16]
+
+        path = quantized_model_path(output_dir, action, precision)
+        path.write_bytes(converter.convert())
+        written[action] = path
+        logger.info(f"Exported {action} model ({precision}) to {path}")
+
+    return written
+
 
 class AsyncDeepFaceAnalyzer:
     """
@@ -40,7 +103,12 @@ class AsyncDeepFaceAnalyzer:
         frame_skip: int = 5,
         input_width: int = 320,
         input_height: int = 240,
-        analyze_actions: list = None
+        analyze_actions: list = None,
+        quantized_model_dir: Optional[str] = None,
+        quantized_precision: str = 'fp16',
+        compile_models: bool = False,
+        use_opencl: bool = False,
+        opencv_threads: Optional[int] = None
     ):
         """
         Initialize the AsyncDeepFaceAnalyzer.
@@ -52,6 +120,16 @@ class AsyncDeepFaceAnalyzer:
             input_width: Target width for analysis (downsampling)
             input_height: Target height for analysis (downsampling)
             analyze_actions: List of actions to analyze (e.g., ['emotion', 'age', 'gender'])
+            quantized_model_dir: Directory holding TFLite models produced by
+                export_quantized_models(). When set and all files exist, these
+                replace DeepFace.analyze's FP32 Keras models.
+            quantized_precision: Precision tag of the TFLite files ('fp16' or 'int8')
+            compile_models: When no TFLite models are used, call DeepFace's Keras
+                attribute models through an XLA-compiled tf.function with a fixed
+                input signature instead of DeepFace.analyze
+            use_opencl: Downsample through cv2.UMat (OpenCL, e.g. iGPU) when available
+            opencv_threads: Size of OpenCV's thread pool for resize/cvtColor. This is
+                process-wide; None leaves OpenCV's setting untouched.
         """
         self.name = name
         self.detector_backend = detector_backend
@@ -59,12 +137,22 @@ class AsyncDeepFaceAnalyzer:
         self.input_width = input_width
         self.input_height = input_height
         self.analyze_actions = analyze_actions or ['emotion', 'age', 'gender']
+        self.use_opencl = use_opencl and cv2.ocl.haveOpenCL()
+        if opencv_threads is not None:
+            cv2.setNumThreads(opencv_threads)
+        
+        # The emotion model is single-channel (48x48x1); when it is the only
+        # action, frames travel through the queue as grayscale (1/3 the bytes)
+        self.grayscale_input = self.analyze_actions == ['emotion']
         
         # Queue for incoming frames (max size 3 to prevent lag buildup)
         self.frame_queue = queue.Queue(maxsize=3)
         
-        # Queue for results (max size 1, we only want the latest)
-        self.result_queue = queue.Queue(maxsize=1)
+        # Single-slot mailbox for results (we only want the latest).
+        # Writer overwrites the slot and sets the event; reader swaps it out.
+        self._result_lock = threading.Lock()
+        self._result_slot = None
+        self._result_ready = threading.Event()
         
         # Control flags
         self.running = False
@@ -79,11 +167,19 @@ class AsyncDeepFaceAnalyzer:
         # Statistics tracking
         self.total_analyses = 0
         self.failed_analyses = 0
-        self.analysis_times = []
+        self.analysis_times_ns = deque(maxlen=1000)  # recent analyses, integer ns
         
         # Configure Metal GPU memory growth for macOS
         self._configure_gpu()
         
+        # Optional direct attribute predictors: action -> (predict_fn, (height, width)).
+        # Empty means every analysis goes through DeepFace.analyze.
+        self.quantized_model_dir = quantized_model_dir
+        self.quantized_precision = quantized_precision
+        self._predictors = self._load_quantized_models() if quantized_model_dir else {}
+        if not self._predictors and compile_models:
+            self._predictors = self._compile_keras_models()
+        
         logger.info(f"AsyncDeepFaceAnalyzer '{name}' initialized with backend={detector_backend}, frame_skip={frame_skip}")
     
     @property
@@ -123,6 +219,169 @@ class AsyncDeepFaceAnalyzer:
             except Exception as e:
                 logger.warning(f"[{self.name}] GPU memory config failed (non-critical): {e}")
 
+    def _load_quantized_models(self) -> Dict[str, Tuple[Callable, Tuple[int, int]]]:
+        """
+        Load TFLite interpreters for every requested action.
+
+        Returns:
+            Mapping of action to (predict_fn, input (height, width)), or an
+            empty dict (fall back to DeepFace.analyze) if any model is missing.
+        """
+        predictors = {}
+        try:
+            import tensorflow as tf
+
+            for action in self.analyze_actions:
+                path = quantized_model_path(
+                    self.quantized_model_dir, action, self.quantized_precision
+                )
+                if not path.exists():
+                    logger.warning(
+                        f"[{self.name}] Quantized model not found: {path}, "
+                        f"falling back to DeepFace.analyze"
+                    )
+                    return {}
+
+                interpreter = tf.lite.Interpreter(model_path=str(path))
+                interpreter.allocate_tensors()
+                input_details = interpreter.get_input_details()[0]
+                output_details = interpreter.get_output_details()[0]
+                _, h, w, _ = input_details['shape']
+                predictors[action] = (
+                    partial(self._invoke, interpreter, input_details, output_details),
+                    (int(h), int(w))
+                )
+
+            logger.info(
+                f"[{self.name}] Loaded {self.quantized_precision} TFLite models "
+                f"for {list(predictors)}"
+            )
+            return predictors
+
+        except Exception as e:
+            logger.warning(f"[{self.name}] Failed to load quantized models: {e}")
+            return {}
+
+    def _compile_keras_models(self) -> Dict[str, Tuple[Callable, Tuple[int, int]]]:
+        """
+        Wrap DeepFace's Keras attribute models in XLA-compiled tf.functions.
+
+        The input signature is fixed to batch size 1 and the model's input
+        shape, so tracing/compilation happens once here (warmup) instead of
+        on the first live frame.
+
+        Returns:
+            Mapping of action to (predict_fn, input (height, width)), or an
+            empty dict (fall back to DeepFace.analyze) on failure.
+        """
+        predictors = {}
+        try:
+            import tensorflow as tf
+
+            for action in self.analyze_actions:
+                keras_model = DeepFace.build_model(QUANTIZED_MODEL_NAMES[action]).model
+                _, h, w, c = keras_model.input_shape
+
+                compiled = tf.function(
+                    lambda x, m=keras_model: m(x, training=False),
+                    input_signature=[tf.TensorSpec([1, h, w, c], tf.float32)],
+                    jit_compile=True
+                )
+                compiled(tf.zeros([1, h, w, c], tf.float32))  # warmup / compile
+
+                predictors[action] = (
+                    lambda x, f=compiled: f(x.astype(np.float32, copy=False)).numpy()[0],
+                    (int(h), int(w))
+                )
+
+            logger.info(f"[{self.name}] Compiled Keras models for {list(predictors)}")
+            return predictors
+
+        except Exception as e:
+            logger.warning(f"[{self.name}] Failed to compile Keras models: {e}")
+            return {}
+
+    @staticmethod
+    def _invoke(interpreter, input_details: dict, output_details: dict, x: np.ndarray) -> np.ndarray:
+        """
+        Run a single TFLite inference, quantizing the input if required.
+
+        The tensor details are looked up once in _load_quantized_models.
+        """
+        if np.issubdtype(input_details['dtype'], np.integer):
+            scale, zero_point = input_details['quantization']
+            x = np.round(x / scale + zero_point).astype(input_details['dtype'])
+        else:
+            x = x.astype(input_details['dtype'], copy=False)
+
+        interpreter.set_tensor(input_details['index'], x)
+        interpreter.invoke()
+        output = interpreter.get_tensor(output_details['index'])
+
+        if np.issubdtype(output_details['dtype'], np.integer):
+            scale, zero_point = output_details['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output[0]
+
+    def _analyze_direct(self, frame: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Analyze a frame with the direct attribute predictors (TFLite or compiled Keras).
+
+        Face detection still goes through DeepFace; only the attribute
+        models are replaced. The result mirrors DeepFace.analyze's keys.
+        """
+        faces = DeepFace.extract_faces(
+            img_path=frame,
+            detector_backend=self.detector_backend,
+            enforce_detection=False,
+            align=True
+        )
+        if not faces:
+            return None
+
+        # RGB float face in [0, 1]
+        face_obj = faces[0]
+        face = face_obj['face'].astype(np.float32, copy=False)
+        analysis = {
+            'region': face_obj.get('facial_area'),
+            'face_confidence': face_obj.get('confidence'),
+        }
+
+        # Same preprocessing as DeepFace.analyze: flip to BGR, then an
+        # aspect-preserving, zero-padded resize to 224x224
+        face_bgr = face[:, :, ::-1]
+        face_224 = preprocessing.resize_image(img=face_bgr, target_size=(224, 224))
+
+        if 'emotion' in self._predictors:
+            predict, (h, w) = self._predictors['emotion']
+            if self.grayscale_input:
+                gray = face_224[0, :, :, 0]  # all channels are equal already
+            else:
+                gray = cv2.cvtColor(face_224[0], cv2.COLOR_BGR2GRAY)
+            gray = cv2.resize(gray, (w, h))
+            probs = predict(gray[None, :, :, None])
+            probs = 100 * probs / probs.sum()
+            analysis['emotion'] = dict(zip(EMOTION_LABELS, probs.tolist()))
+
+        for action in ('age', 'gender'):
+            if action not in self._predictors:
+                continue
+            predict, (h, w) = self._predictors[action]
+            if (h, w) == (224, 224):
+                face_input = face_224
+            else:
+                face_input = preprocessing.resize_image(img=face_bgr, target_size=(h, w))
+
+            if action == 'age':
+                age_probs = predict(face_input)
+                analysis['age'] = int(np.sum(age_probs * np.arange(age_probs.size)))
+            else:
+                gender_probs = 100 * predict(face_input)
+                analysis['gender'] = dict(zip(GENDER_LABELS, gender_probs.tolist()))
+                analysis['dominant_gender'] = GENDER_LABELS[int(np.argmax(gender_probs))]
+
+        return analysis
+
     def start(self):
         """Start the analysis worker thread."""
         if self.running:
@@ -152,7 +411,13 @@ class AsyncDeepFaceAnalyzer:
             else:
                 logger.info(f"[{self.name}] AsyncDeepFaceAnalyzer thread stopped")
 
-    def submit_frame(self, frame: np.ndarray, class_name: str = None, confidence: float = None):
+    def submit_frame(
+        self,
+        frame: np.ndarray,
+        class_name: str = None,
+        confidence: float = None,
+        preprocessed: bool = False
+    ):
         """
         Submit a frame for analysis. Non-blocking.
         
@@ -160,9 +425,13 @@ class AsyncDeepFaceAnalyzer:
             frame: Image frame to analyze
             class_name: Optional classification result from Keras model
             confidence: Optional confidence score
+            preprocessed: True if the caller already downsampled the frame
+                to input_size; otherwise it is resized here before enqueueing
             
         Note:
             If queue is full, the oldest frame is removed to keep up with real-time processing.
+            Downsampling happens on the producer side so only the small frame
+            crosses the thread boundary and the full-resolution frame is not retained.
         """
         if not self.running:
             return
@@ -173,6 +442,12 @@ class AsyncDeepFaceAnalyzer:
             if self.frame_counter % self.frame_skip != 0:
                 return  # Skip this frame
             
+            # Downsample before enqueueing (less data held by the queue)
+            if not preprocessed and self.input_width and self.input_height:
+                frame = self._downsample(frame)
+            if self.grayscale_input and frame.ndim == 3:
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            
             # If queue is full, remove oldest frame to keep latest data
             if self.frame_queue.full():
                 try:
@@ -192,6 +467,19 @@ class AsyncDeepFaceAnalyzer:
         except queue.Full:
             pass  # Should not happen due to logic above
 
+    def _downsample(self, frame: np.ndarray) -> np.ndarray:
+        """Resize a frame to input_size, on the OpenCL device if enabled."""
+        size = (self.input_width, self.input_height)
+        if self.use_opencl:
+            try:
+                return cv2.resize(
+                    cv2.UMat(frame), size, interpolation=cv2.INTER_NEAREST
+                ).get()
+            except cv2.error as e:
+                logger.warning(f"[{self.name}] OpenCL resize failed, using CPU: {e}")
+                self.use_opencl = False
+        return cv2.resize(frame, size, interpolation=cv2.INTER_NEAREST)
+
     def get_result(self, timeout: float = 0.0) -> Optional[Dict[str, Any]]:
         """
         Get the latest analysis result. Non-blocking by default.
@@ -202,16 +490,15 @@ class AsyncDeepFaceAnalyzer:
         Returns:
             Dictionary with analysis results or None if no result available
         """
-        # Check if there is a new result in the queue
-        try:
-            if timeout > 0:
-                self.latest_result = self.result_queue.get(timeout=timeout)
-            else:
-                # Non-blocking: drain all results and get the latest
-                while not self.result_queue.empty():
-                    self.latest_result = self.result_queue.get_nowait()
-        except queue.Empty:
-            pass
+        if timeout > 0:
+            self._result_ready.wait(timeout)
+        
+        # Take the pending result (if any) out of the slot
+        with self._result_lock:
+            if self._result_slot is not None:
+                self.latest_result = self._result_slot
+                self._result_slot = None
+                self._result_ready.clear()
             
         return self.latest_result
 
@@ -227,17 +514,21 @@ class AsyncDeepFaceAnalyzer:
                 except queue.Empty:
                     continue
 
-                # Extract frame
-                frame = frame_data['frame']
+                # Extract frame and drop the queue item so nothing else keeps it alive
+                frame = frame_data.pop('frame')
+                del frame_data
                 
                 # Process frame with timing
-                analysis_start = time.time()
+                analysis_start_ns = time.perf_counter_ns()
                 result = self._analyze(frame)
-                analysis_time = time.time() - analysis_start
+                analysis_time_ns = time.perf_counter_ns() - analysis_start_ns
+                
+                # Release the frame now rather than on the next loop iteration
+                del frame
                 
                 # Update statistics
                 self.total_analyses += 1
-                self.analysis_times.append(analysis_time)
+                self.analysis_times_ns.append(analysis_time_ns)
                 if result is None:
                     self.failed_analyses += 1
                 
@@ -246,17 +537,10 @@ class AsyncDeepFaceAnalyzer:
                     result['analyzer_name'] = self.name
                     result['analysis_timestamp'] = time.time()
                     
-                    # Put result (replace old result if exists)
-                    while not self.result_queue.empty():
-                        try:
-                            self.result_queue.get_nowait()
-                        except queue.Empty:
-                            break
-                    
-                    try:
-                        self.result_queue.put_nowait(result)
-                    except queue.Full:
-                        pass  # Should not happen
+                    # Publish result (overwrites an unread older result)
+                    with self._result_lock:
+                        self._result_slot = result
+                        self._result_ready.set()
                     
             except Exception as e:
                 logger.error(f"[{self.name}] Error in async analysis loop: {e}", exc_info=True)
@@ -267,33 +551,35 @@ class AsyncDeepFaceAnalyzer:
         Perform the actual DeepFace analysis.
         
         Args:
-            frame: Image frame to analyze
+            frame: Image frame to analyze, already downsampled by submit_frame
+                (single-channel when grayscale_input is set)
             
         Returns:
             Dictionary with analysis results or None if analysis failed
         """
         try:
-            # Downsample for performance (40-50% faster)
-            if self.input_width and self.input_height:
-                small_frame = cv2.resize(frame, (self.input_width, self.input_height))
+            # Face detectors expect a 3-channel image
+            if frame.ndim == 2:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            
+            if self._predictors:
+                # Direct attribute models (TFLite or compiled Keras)
+                analysis = self._analyze_direct(frame)
             else:
-                small_frame = frame
-
-            # DeepFace analysis
-            # enforce_detection=False to avoid errors when face not detected
-            # silent=True to suppress DeepFace logging
-            objs = DeepFace.analyze(
-                img_path=small_frame,
-                actions=self.analyze_actions,
-                detector_backend=self.detector_backend,
-                enforce_detection=False,
-                silent=True
-            )
+                # DeepFace analysis
+                # enforce_detection=False to avoid errors when face not detected
+                # silent=True to suppress DeepFace logging
+                objs = DeepFace.analyze(
+                    img_path=frame,
+                    actions=self.analyze_actions,
+                    detector_backend=self.detector_backend,
+                    enforce_detection=False,
+                    silent=True
+                )
+                # Use the first face found (assuming single person per camera)
+                analysis = objs[0] if objs else None
             
-            if objs and len(objs) > 0:
-                # Return the first face found (assuming single person per camera)
-                analysis = objs[0]
-                
+            if analysis:
                 # Extract dominant emotion
                 if 'emotion' in analysis:
                     emotions = analysis['emotion']
@@ -306,7 +592,8 @@ class AsyncDeepFaceAnalyzer:
         except Exception as e:
             # DeepFace might raise error if no face found even with enforce_detection=False
             # or other internal errors. We log at debug level to avoid spam.
-            logger.debug(f"[{self.name}] DeepFace analysis failed: {e}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("[%s] DeepFace analysis failed: %s", self.name, e)
             return None
     
     def get_statistics(self) -> Dict[str, Any]:
@@ -319,10 +606,12 @@ class AsyncDeepFaceAnalyzer:
             - failed_analyses: Number of failed analyses
             - success_rate: Success rate as a percentage
             - average_analysis_time: Average time per analysis in seconds
+              (over the most recent 1000 analyses)
         """
         success_count = self.total_analyses - self.failed_analyses
         success_rate = (success_count / self.total_analyses * 100) if self.total_analyses > 0 else 0.0
-        avg_time = sum(self.analysis_times) / len(self.analysis_times) if self.analysis_times else 0.0
+        times_ns = list(self.analysis_times_ns)
+        avg_time = sum(times_ns) / len(times_ns) * 1e-9 if times_ns else 0.0
         
         return {
             'total_analyses': self.total_analyses,
@@ -5,6 +5,7 @@ This module provides unified camera frame processing logic,
 eliminating code duplication between multiple cameras.
 """
 
+import logging
 import time
 from typing import Dict, Optional
 import numpy as np
@@ -15,6 +16,13 @@ from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Timing thresholds, bound once at import so the per-frame path
+# does not repeat class attribute lookups.
+_LOW_CONF_TIMEOUT = AnalysisConfig.LOW_CONFIDENCE_TIMEOUT_SEC
+_PRESENCE_DELAY = AnalysisConfig.PRESENCE_DETECTION_DELAY_SEC
+_DEMOGRAPHIC_DURATION = AnalysisConfig.DEMOGRAPHIC_ANALYSIS_DURATION_SEC
+_ABSENCE_DELAY = AnalysisConfig.ABSENCE_DETECTION_DELAY_SEC
+
 
 def process_camera_frame(
     frame: np.ndarray,
@@ -43,7 +51,8 @@ def process_camera_frame(
     Returns:
         Dictionary with analysis results, or None if not analyzing.
     """
-    current_time = time.time()
+    # Monotonic clock: elapsed-time checks are immune to wall-clock changes
+    current_time = time.monotonic()
     
     # Check if we should start or stop analysis
     if class_name == 'Class 1':  # Person present
@@ -51,11 +60,12 @@ def process_camera_frame(
         if confidence_score < 1.0:
             if camera_state.low_confidence_start_time is None:
                 camera_state.low_confidence_start_time = current_time
-                logger.debug(f"{camera_id}: Low confidence started")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("%s: Low confidence started", camera_id)
             elif (current_time - camera_state.low_confidence_start_time) > \
-                 AnalysisConfig.LOW_CONFIDENCE_TIMEOUT_SEC:
+                 _LOW_CONF_TIMEOUT:
                 logger.warning(
-                    f"{camera_id}: Low confidence timeout, stopping analysis"
+                    "%s: Low confidence timeout, stopping analysis", camera_id
                 )
                 return {'stop': True}
         else:
@@ -65,7 +75,7 @@ def process_camera_frame(
         if not camera_state.person_detected:
             camera_state.person_detected = True
             camera_state.person_detection_start_time = current_time
-            logger.info(f"{camera_id}: Person detected, starting tracking")
+            logger.info("%s: Person detected, starting tracking", camera_id)
         
         camera_state.no_person_detected = False
         
@@ -73,7 +83,7 @@ def process_camera_frame(
         if not camera_state.no_person_detected:
             camera_state.no_person_detected = True
             camera_state.no_person_detection_start_time = current_time
-            logger.info(f"{camera_id}: Person absence detected")
+            logger.info("%s: Person absence detected", camera_id)
         
         camera_state.person_detected = False
     
@@ -92,11 +102,11 @@ def process_camera_frame(
         elapsed_time = current_time - camera_state.person_detection_start_time
         
         # Wait for presence detection delay
-        if elapsed_time > AnalysisConfig.PRESENCE_DETECTION_DELAY_SEC:
+        if elapsed_time > _PRESENCE_DELAY:
             # Determine which analysis function to use
             if camera_state.should_analyze_demographics(
                 elapsed_time,
-                AnalysisConfig.DEMOGRAPHIC_ANALYSIS_DURATION_SEC
+                _DEMOGRAPHIC_DURATION
             ):
                 # Analyze with demographics
                 result = analyze_with_demographics_func(
@@ -105,9 +115,10 @@ def process_camera_frame(
                 )
                 
                 # Cache demographics if we're at the threshold
-                if elapsed_time >= AnalysisConfig.DEMOGRAPHIC_ANALYSIS_DURATION_SEC:
+                if elapsed_time >= _DEMOGRAPHIC_DURATION:
                     camera_state.cache_demographics()
-                    logger.debug(f"{camera_id}: Demographics cached")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("%s: Demographics cached", camera_id)
                 
                 return result
             else:
@@ -131,8 +142,8 @@ def process_camera_frame(
         
         elapsed_time = current_time - camera_state.no_person_detection_start_time
         
-        if elapsed_time > AnalysisConfig.ABSENCE_DETECTION_DELAY_SEC:
-            logger.info(f"{camera_id}: Absence confirmed, stopping analysis")
+        if elapsed_time > _ABSENCE_DELAY:
+            logger.info("%s: Absence confirmed, stopping analysis", camera_id)
             return {'stop': True}
     
     return None
@@ -149,14 +160,15 @@ def should_exit(camera_states: Dict[str, CameraState]) -> bool:
         True if should exit, False otherwise.
     """
     # Exit if any camera detected prolonged absence
+    now = time.monotonic()
     for camera_id, state in camera_states.items():
         if state.no_person_detected and \
            state.no_person_detection_start_time is not None:
             
-            elapsed = time.time() - state.no_person_detection_start_time
+            elapsed = now - state.no_person_detection_start_time
             
-            if elapsed > AnalysisConfig.ABSENCE_DETECTION_DELAY_SEC:
-                logger.info(f"Exit triggered by {camera_id}")
+            if elapsed > _ABSENCE_DELAY:
+                logger.info("Exit triggered by %s", camera_id)
                 return True
     
     return False
@@ -3,42 +3,129 @@
 
 提供影像預處理和分類功能，封裝 Keras 模型的預測邏輯。
 """
+import logging
+import threading
+import time
 import cv2
 import numpy as np
-from typing import Tuple
+from typing import Dict, List, Optional, Tuple
 from keras.models import Model
 
 from config import Config
 from utils.logging_config import get_logger
+from utils._preproc_numba import HAS_NUMBA, PREPROC_SIZE, preproc_224
 
 logger = get_logger(__name__)
 
+# 人物偵測信心度閾值（模組載入時讀取一次）
+_MIN_CONF = Config().analysis.MIN_CONFIDENCE
 
-def preprocess_frame(frame: np.ndarray, target_size: Tuple[int, int] = (224, 224)) -> np.ndarray:
+# 224x224 float 預處理改走 Numba 融合核心（需啟用設定且已安裝 numba）
+_USE_NUMBA = Config().analysis.NUMBA_PREPROCESS and HAS_NUMBA
+
+# 畫面不變時沿用上次分類結果（感知雜湊）
+_HASH_SKIP = Config().analysis.FRAME_HASH_SKIP
+_HASH_MAX_DISTANCE = Config().analysis.FRAME_HASH_MAX_DISTANCE
+_HASH_MAX_AGE = Config().analysis.FRAME_HASH_MAX_AGE_SEC
+
+# 攝影機 ID -> (雜湊, 類別名稱, 信心分數, 分類時間 monotonic)
+_LAST: Dict[str, Tuple[int, str, float, float]] = {}
+
+
+# uint8 -> [-1, 1] 正規化查找表（256 個 float32，常駐 L1 快取）
+_NORM_LUT = np.arange(256, dtype=np.float32) / 127.5 - 1.0
+
+# 每個執行緒各自持有的預處理暫存緩衝區：target_size -> (uint8 縮放緩衝, float32 輸出張量)
+_scratch = threading.local()
+
+
+def _get_scratch_buffers(target_size: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    取得（必要時建立）指定尺寸的預處理暫存緩衝區
+    
+    Args:
+        target_size: 目標尺寸 (width, height)
+        
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (uint8 (H, W, 3) 縮放緩衝, float32 (1, H, W, 3) 輸出張量)
+    """
+    buffers = getattr(_scratch, 'buffers', None)
+    if buffers is None:
+        buffers = _scratch.buffers = {}
+    
+    if target_size not in buffers:
+        width, height = target_size
+        buffers[target_size] = (
+            np.empty((height, width, 3), dtype=np.uint8),
+            np.empty((1, height, width, 3), dtype=np.float32)
+        )
+    return buffers[target_size]
+
+
+def preprocess_frame(
+    frame: np.ndarray,
+    target_size: Tuple[int, int] = (224, 224),
+    out: Optional[np.ndarray] = None,
+    normalize: bool = True
+) -> np.ndarray:
     """
     預處理影像幀以供 Keras 模型使用
     
+    縮放結果寫入預先配置的 uint8 緩衝區，再以 256 項查找表
+    (x / 127.5 - 1) 一次 gather 直接寫入 float32 輸出張量，每幀不再配置新陣列。
+    normalize=False 時（INT8 模型）只做縮放，回傳 uint8 張量。
+    啟用 NUMBA_PREPROCESS 且目標為 224x224 時，改由 Numba 核心一次完成
+    縮放與正規化。
+    
+    注意：未指定 out 時回傳的是本執行緒共用的暫存張量，下一次呼叫
+    會覆寫其內容；需要保留結果的呼叫端請自行 copy()。
+    
     Args:
         frame: 原始影像幀
         target_size: 目標尺寸 (width, height)
+        out: 選用的輸出陣列（normalize=False 時為 uint8），形狀為
+            (height, width, 3) 或 (1, height, width, 3)
+        normalize: 是否正規化到 [-1, 1]
         
     Returns:
-        預處理後的影像陣列，形狀為 (1, height, width, 3)
+        預處理後的影像陣列，形狀為 (1, height, width, 3)（或 out 本身）
+        
+    Raises:
+        ValueError: 如果 frame 不是 uint8 三通道 (H, W, 3) 影像
     """
     try:
-        # 調整大小
-        resized = cv2.resize(frame, target_size, interpolation=cv2.INTER_AREA)
+        # 形狀或型別不符時 OpenCV 會另配 dst 而不寫入暫存緩衝區，
+        # 導致靜默回傳上一幀的結果，因此先行檢查
+        if frame.dtype != np.uint8 or frame.ndim != 3 or frame.shape[2] != 3:
+            raise ValueError(
+                f"Expected uint8 (H, W, 3) frame, got {frame.dtype} {frame.shape}"
+            )
+        
+        resize_buf, scratch = _get_scratch_buffers(target_size)
+        
+        if not normalize:
+            # INT8 模型：uint8 像素直接由輸入量化參數對應到 [-1, 1]
+            if out is None:
+                out = resize_buf[np.newaxis]
+            dst = out[0] if out.ndim == 4 else out
+            cv2.resize(frame, target_size, dst=dst, interpolation=cv2.INTER_LINEAR)
+            return out
         
-        # 轉換為浮點數
-        image_array = np.asarray(resized, dtype=np.float32)
+        if out is None:
+            out = scratch
+        dst = out[0] if out.ndim == 4 else out
         
-        # 正規化到 [-1, 1]
-        normalized = (image_array / 127.5) - 1
+        if _USE_NUMBA and target_size == (PREPROC_SIZE, PREPROC_SIZE):
+            preproc_224(frame, dst)
+            return out
         
-        # 增加批次維度
-        batched = normalized.reshape(1, target_size[1], target_size[0], 3)
+        # 調整大小（寫入暫存緩衝區）
+        cv2.resize(frame, target_size, dst=resize_buf, interpolation=cv2.INTER_LINEAR)
         
-        return batched
+        # 正規化到 [-1, 1]：查表取代逐像素除法/減法，直接寫入輸出張量
+        cv2.LUT(resize_buf, _NORM_LUT, dst=dst)
+        
+        return out
         
     except Exception as e:
         logger.error(f"Error preprocessing frame: {e}", exc_info=True)
@@ -65,21 +152,23 @@ def classify_frame(
         ValueError: 如果預測失敗
     """
     try:
-        # 預處理影像
-        processed_frame = preprocess_frame(frame)
+        # 預處理影像（uint8 輸入的 INT8 模型略過浮點正規化）
+        normalize = getattr(model, 'input_dtype', np.float32) != np.uint8
+        processed_frame = preprocess_frame(frame, normalize=normalize)
         
-        # 進行預測
-        prediction = model.predict(processed_frame, verbose=0)
+        # 進行預測（直接呼叫模型，略過 predict() 的 Dataset/callback 開銷）
+        prediction = np.asarray(model(processed_frame, training=False))
         
         # 找出最高信心度的類別
         index = np.argmax(prediction)
         class_name = class_names[index].strip()
         confidence_score = float(prediction[0][index])
         
-        logger.debug(
-            f"Classification result: {class_name} "
-            f"(confidence: {confidence_score:.2%})"
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Classification result: %s (confidence: %.2f%%)",
+                class_name, confidence_score * 100
+            )
         
         return class_name, confidence_score
         
@@ -88,6 +177,234 @@ def classify_frame(
         raise ValueError(f"Classification failed: {e}")
 
 
+def _get_batch_buffer(
+    batch_size: int,
+    target_size: Tuple[int, int],
+    dtype: type = np.float32
+) -> np.ndarray:
+    """
+    取得（必要時建立）本執行緒的批次輸入張量
+    
+    Args:
+        batch_size: 批次大小
+        target_size: 目標尺寸 (width, height)
+        dtype: 張量型別（INT8 模型為 uint8）
+        
+    Returns:
+        dtype 陣列，形狀為 (batch_size, height, width, 3)
+    """
+    batches = getattr(_scratch, 'batches', None)
+    if batches is None:
+        batches = _scratch.batches = {}
+    
+    key = (batch_size, target_size, np.dtype(dtype))
+    if key not in batches:
+        width, height = target_size
+        batches[key] = np.empty((batch_size, height, width, 3), dtype=dtype)
+    return batches[key]
+
+
+def classify_frames_batch(
+    frames: List[np.ndarray],
+    model: Model,
+    class_names: list,
+    target_size: Tuple[int, int] = (224, 224)
+) -> List[Tuple[str, float]]:
+    """
+    以單次前向運算同時分類多個影像幀（例如兩個攝影機）
+    
+    各幀預處理後直接寫入預先配置的 (N, H, W, 3) 批次張量，
+    再以 model(batch, training=False) 一次推論，省去逐幀的 predict 開銷。
+    
+    Args:
+        frames: 原始影像幀列表
+        model: 已載入的 Keras 模型
+        class_names: 類別名稱列表
+        target_size: 目標尺寸 (width, height)
+        
+    Returns:
+        List[Tuple[str, float]]: 與 frames 順序相同的 (類別名稱, 信心分數)
+        
+    Raises:
+        ValueError: 如果預測失敗
+    """
+    if not frames:
+        return []
+    
+    try:
+        normalize = getattr(model, 'input_dtype', np.float32) != np.uint8
+        input_dtype = np.float32 if normalize else np.uint8
+        
+        batch = _get_batch_buffer(len(frames), target_size, input_dtype)
+        for i, frame in enumerate(frames):
+            preprocess_frame(frame, target_size, out=batch[i], normalize=normalize)
+        
+        return classify_tensors(batch, model, class_names)
+        
+    except Exception as e:
+        logger.error(f"Error classifying frame batch: {e}", exc_info=True)
+        raise ValueError(f"Batch classification failed: {e}")
+
+
+def classify_tensors(
+    batch: np.ndarray,
+    model: Model,
+    class_names: list
+) -> List[Tuple[str, float]]:
+    """
+    對已預處理的批次張量進行分類（例如 PreprocWorker 的輸出）
+    
+    Args:
+        batch: 預處理後的張量，形狀為 (N, H, W, 3)
+        model: 已載入的 Keras 模型
+        class_names: 類別名稱列表
+        
+    Returns:
+        List[Tuple[str, float]]: 每個樣本的 (類別名稱, 信心分數)
+        
+    Raises:
+        ValueError: 如果預測失敗
+    """
+    try:
+        predictions = np.asarray(model(batch, training=False))
+        indices = np.argmax(predictions, axis=1)
+        
+        results = [
+            (class_names[index].strip(), float(predictions[i, index]))
+            for i, index in enumerate(indices)
+        ]
+        
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Batch classification results: %s", results)
+        
+        return results
+        
+    except Exception as e:
+        logger.error(f"Error classifying tensors: {e}", exc_info=True)
+        raise ValueError(f"Batch classification failed: {e}")
+
+
+def frame_hash(frame: np.ndarray) -> int:
+    """
+    計算影像的 64 位元平均雜湊 (aHash)
+    
+    灰階後縮成 8x8，每個像素與平均值比較得到 1 bit。對亮度的仿射變換
+    不敏感，因此原始 uint8 畫面與正規化後的張量（除了接近平均值的
+    像素可能因捨入而翻轉外）會得到相同的雜湊。
+    
+    Args:
+        frame: BGR 影像 (H, W, 3)，uint8 或 float32
+        
+    Returns:
+        int: 64 位元雜湊值
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (8, 8), interpolation=cv2.INTER_AREA)
+    return int(np.packbits(small > small.mean()).view('>u8')[0])
+
+
+def get_cached_classification(
+    camera_id: str,
+    h: int,
+    now: Optional[float] = None
+) -> Optional[Tuple[str, float]]:
+    """
+    查詢可沿用的分類結果
+    
+    雜湊漢明距離小於 FRAME_HASH_MAX_DISTANCE 且結果未超過
+    FRAME_HASH_MAX_AGE_SEC 時才命中；停用 FRAME_HASH_SKIP 時一律不命中。
+    
+    Args:
+        camera_id: 攝影機 ID
+        h: 目前畫面的 frame_hash()
+        now: 目前時間（time.monotonic()），未提供時自動取得
+        
+    Returns:
+        (類別名稱, 信心分數)，無可沿用結果時為 None
+    """
+    if not _HASH_SKIP:
+        return None
+    
+    entry = _LAST.get(camera_id)
+    if entry is None:
+        return None
+    
+    prev_h, class_name, confidence, timestamp = entry
+    if now is None:
+        now = time.monotonic()
+    if now - timestamp > _HASH_MAX_AGE:
+        return None
+    if bin(prev_h ^ h).count('1') >= _HASH_MAX_DISTANCE:
+        return None
+    return class_name, confidence
+
+
+def cache_classification(
+    camera_id: str,
+    h: int,
+    class_name: str,
+    confidence: float,
+    now: Optional[float] = None
+):
+    """
+    記錄攝影機最新一次實際推論的分類結果
+    
+    Args:
+        camera_id: 攝影機 ID
+        h: 該畫面的 frame_hash()
+        class_name: 類別名稱
+        confidence: 信心分數
+        now: 分類時間（time.monotonic()），未提供時自動取得
+    """
+    if now is None:
+        now = time.monotonic()
+    _LAST[camera_id] = (h, class_name, confidence, now)
+
+
+def reset_classification_cache(camera_id: Optional[str] = None):
+    """
+    清除沿用的分類結果
+    
+    Args:
+        camera_id: 攝影機 ID；None 表示清除全部
+    """
+    if camera_id is None:
+        _LAST.clear()
+    else:
+        _LAST.pop(camera_id, None)
+
+
+def classify_frame_cached(
+    camera_id: str,
+    frame: np.ndarray,
+    model: Model,
+    class_names: list
+) -> Tuple[str, float]:
+    """
+    對影像幀進行分類；畫面與上次幾乎相同時直接沿用上次結果
+    
+    Args:
+        camera_id: 攝影機 ID（每個攝影機各自快取）
+        frame: 原始影像幀
+        model: 已載入的 Keras 模型
+        class_names: 類別名稱列表
+        
+    Returns:
+        Tuple[str, float]: (類別名稱, 信心分數)
+        
+    Raises:
+        ValueError: 如果預測失敗
+    """
+    h = frame_hash(frame)
+    cached = get_cached_classification(camera_id, h)
+    if cached is not None:
+        return cached
+    
+    class_name, confidence = classify_frame(frame, model, class_names)
+    cache_classification(camera_id, h, class_name, confidence)
+    return class_name, confidence
+
+
 def is_person_detected(class_name: str, confidence_score: float) -> bool:
     """
     判斷是否檢測到人
@@ -99,11 +416,7 @@ def is_person_detected(class_name: str, confidence_score: float) -> bool:
     Returns:
         True 如果檢測到人且信心度足夠
     """
-    config = Config()
-    return (
-        class_name == 'Class 1' and
-        confidence_score >= config.analysis.MIN_CONFIDENCE
-    )
+    return class_name == 'Class 1' and confidence_score >= _MIN_CONF
 
 
 def is_session_end(class_name: str) -> bool:
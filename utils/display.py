@@ -3,16 +3,44 @@
 
 提供在影像上繪製文字和視覺化分析結果的功能。
 """
+from functools import lru_cache
+
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 
 from config import Config
 from utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# 字體檔案路徑（模組載入時解析一次）
+_FONT_PATH = str(Config().paths.FONT_PATH)
+
+# 預先點陣化的文字 sprite：(text, font_size, color) -> (位移, 1 - alpha, color * alpha, 前進寬度)
+# 靜態前綴以整段文字為鍵，動態數值則以單一字元（字形）為鍵
+_LABEL_ATLAS: Dict[Tuple[str, int, tuple], Tuple[Tuple[int, int], np.ndarray, np.ndarray, float]] = {}
+_LABEL_ATLAS_MAX = 1024
+
+# 分割畫面輸出畫布：(shape1, shape2, dtype, 是否水平) -> 預先配置的合併影像
+_CANVAS: Dict[Tuple[tuple, tuple, np.dtype, bool], np.ndarray] = {}
+
+
+@lru_cache(maxsize=8)
+def _get_font(path: str, size: int) -> ImageFont.FreeTypeFont:
+    """
+    載入並快取 TrueType 字體（避免每次繪製都從磁碟解析字型檔）
+    
+    Args:
+        path: 字體檔案路徑
+        size: 字體大小
+        
+    Returns:
+        PIL 字體物件
+    """
+    return ImageFont.truetype(path, size)
+
 
 def put_text_chinese(
     img: np.ndarray,
@@ -37,11 +65,8 @@ def put_text_chinese(
         繪製文字後的影像
     """
     try:
-        config = Config()
-        font_path = config.paths.FONT_PATH
-        
-        # 載入字體
-        font = ImageFont.truetype(str(font_path), font_size)
+        # 載入字體（快取）
+        font = _get_font(_FONT_PATH, font_size)
         
         # 轉換為 PIL Image
         img_pil = Image.fromarray(img)
@@ -62,6 +87,122 @@ def put_text_chinese(
         return img
 
 
+def _get_label_sprite(
+    text: str,
+    font_size: int,
+    color: tuple
+) -> Tuple[Tuple[int, int], np.ndarray, np.ndarray, float]:
+    """
+    取得（必要時以 PIL 預先點陣化）文字的 sprite
+    
+    Args:
+        text: 文字（靜態前綴或單一字元）
+        font_size: 字體大小
+        color: 文字顏色 (B, G, R)
+        
+    Returns:
+        ((dx, dy) 相對繪製原點的位移, 1 - alpha (h, w, 1), color * alpha (h, w, 3),
+        繪製後原點的水平前進量)
+    """
+    key = (text, font_size, color)
+    sprite = _LABEL_ATLAS.get(key)
+    if sprite is not None:
+        return sprite
+    
+    font = _get_font(_FONT_PATH, font_size)
+    left, top, right, bottom = font.getbbox(text)
+    
+    # 只點陣化 alpha 遮罩（抗鋸齒灰階），上色在混合時完成
+    mask = Image.new('L', (max(right - left, 1), max(bottom - top, 1)), 0)
+    ImageDraw.Draw(mask).text((-left, -top), text, font=font, fill=255)
+    
+    alpha = np.asarray(mask, dtype=np.float32)[:, :, np.newaxis] / 255.0
+    sprite = (
+        (left, top),
+        1.0 - alpha,
+        alpha * np.asarray(color, dtype=np.float32),
+        font.getlength(text)
+    )
+    
+    # 前綴與字形的組合有限，上限只是防止異常輸入讓 atlas 無限成長
+    if len(_LABEL_ATLAS) >= _LABEL_ATLAS_MAX:
+        _LABEL_ATLAS.clear()
+    _LABEL_ATLAS[key] = sprite
+    return sprite
+
+
+def _blit_sprite(img: np.ndarray, x: int, y: int, sprite) -> None:
+    """
+    以 alpha 混合將 sprite 原地貼到影像上（超出邊界的部分會被裁切）
+    
+    Args:
+        img: OpenCV 影像（原地修改）
+        x: X 座標（文字繪製原點）
+        y: Y 座標（文字繪製原點）
+        sprite: _get_label_sprite 的回傳值
+    """
+    (dx, dy), inv_alpha, premultiplied, _ = sprite
+    h, w = inv_alpha.shape[:2]
+    x0, y0 = x + dx, y + dy
+    
+    # 與影像範圍取交集
+    sx0, sy0 = max(0, -x0), max(0, -y0)
+    sx1 = min(w, img.shape[1] - x0)
+    sy1 = min(h, img.shape[0] - y0)
+    if sx1 <= sx0 or sy1 <= sy0:
+        return
+    
+    roi = img[y0 + sy0:y0 + sy1, x0 + sx0:x0 + sx1]
+    roi[:] = (
+        roi * inv_alpha[sy0:sy1, sx0:sx1] + premultiplied[sy0:sy1, sx0:sx1]
+    ).astype(np.uint8)
+
+
+def put_texts_chinese(
+    img: np.ndarray,
+    lines: List[Tuple[str, str, int, int]],
+    font_size: int = 32,
+    color: tuple = (0, 0, 0)
+) -> np.ndarray:
+    """
+    在影像上一次繪製多行中文文字
+    
+    每行分為靜態前綴（如 "Age: "）與動態數值：前綴整段點陣化一次存入
+    _LABEL_ATLAS，數值則逐字元取用字形 sprite，信心度等每幀變動的數值
+    也不必重新點陣化。之後只需在文字所在的小區域做 NumPy alpha 混合，
+    不再對整張影像做 PIL 轉換。文字直接繪製在 img 上（原地修改）。
+    
+    Args:
+        img: OpenCV 影像 (numpy array)
+        lines: (靜態前綴, 動態數值, X 座標, Y 座標) 列表
+        font_size: 字體大小
+        color: 文字顏色 (B, G, R)
+        
+    Returns:
+        繪製文字後的影像
+    """
+    color = tuple(color)
+    try:
+        for prefix, value, x, y in lines:
+            sprite = _get_label_sprite(prefix, font_size, color)
+            _blit_sprite(img, x, y, sprite)
+            
+            pen_x = x + sprite[3]
+            for char in value:
+                sprite = _get_label_sprite(char, font_size, color)
+                _blit_sprite(img, int(round(pen_x)), y, sprite)
+                pen_x += sprite[3]
+        return img
+        
+    except Exception as e:
+        logger.error(f"Error drawing Chinese text: {e}", exc_info=True)
+        # 如果失敗，使用 OpenCV 的基本文字（不支援中文）
+        for prefix, value, x, y in lines:
+            cv2.putText(img, prefix + value, (x, y), cv2.FONT_HERSHEY_SIMPLEX,
+                       font_size / 32, color, 2)
+        return img
+
+
 def draw_analysis_results(
     img: np.ndarray,
     results: Dict[str, Any],
@@ -70,13 +211,16 @@ def draw_analysis_results(
     """
     在影像上繪製分析結果
     
+    文字直接繪製在 img 上（原地修改），回傳的就是 img 本身；
+    需要保留原始影像的呼叫端請先自行 copy()。
+    
     Args:
-        img: 原始影像
+        img: 原始影像（會被修改）
         results: 分析結果字典
         show_demographics: 是否顯示年齡和性別
         
     Returns:
-        繪製結果後的影像
+        繪製結果後的影像（即 img）
     """
     try:
         # 提取結果
@@ -84,21 +228,11 @@ def draw_analysis_results(
         confidence = results.get('confidence_score', 0)
         emotion = results.get('emotion', 'Unknown')
         
-        # 繪製分類和信心度
-        img = put_text_chinese(
-            img,
-            f"{class_name}, Confidence: {confidence}%",
-            10, 30,
-            font_size=28
-        )
-        
-        # 繪製情緒
-        img = put_text_chinese(
-            img,
-            f"Emotion: {emotion}",
-            10, 70,
-            font_size=28
-        )
+        # 分類和信心度、情緒：(靜態前綴, 動態數值, x, y)
+        lines = [
+            (f"{class_name}, Confidence: ", f"{confidence}%", 10, 30),
+            ("Emotion: ", f"{emotion}", 10, 70),
+        ]
         
         # 如果有年齡和性別資訊且需要顯示
         if show_demographics:
@@ -107,22 +241,13 @@ def draw_analysis_results(
             gender_confidence = results.get('gender_confidence')
             
             if age is not None:
-                img = put_text_chinese(
-                    img,
-                    f"Age: {age}",
-                    10, 110,
-                    font_size=28
-                )
+                lines.append(("Age: ", f"{age}", 10, 110))
             
             if gender is not None and gender_confidence is not None:
-                img = put_text_chinese(
-                    img,
-                    f"Gender: {gender} {gender_confidence}%",
-                    10, 150,
-                    font_size=28
-                )
+                lines.append(("Gender: ", f"{gender} {gender_confidence}%", 10, 150))
         
-        return img
+        # 前綴與數值字形的 sprite 都來自 _LABEL_ATLAS，只在文字區域做混合
+        return put_texts_chinese(img, lines, font_size=28)
         
     except Exception as e:
         logger.error(f"Error drawing analysis results: {e}", exc_info=True)
@@ -146,8 +271,8 @@ def resize_and_flip_frame(
         處理後的影像
     """
     try:
-        # 調整大小
-        resized = cv2.resize(frame, target_size)
+        # 調整大小（縮放比例小，雙線性插值即可）
+        resized = cv2.resize(frame, target_size, interpolation=cv2.INTER_LINEAR)
         
         # 翻轉（如鏡像效果）
         if flip:
@@ -168,6 +293,12 @@ def create_split_screen(
     """
     建立分割畫面
     
+    輸出畫布依輸入尺寸與方向快取，每次呼叫只以切片指派複製兩個來源，
+    不再配置新陣列。
+    
+    注意：相同版面的呼叫會回傳同一個畫布，下一次呼叫會覆寫其內容；
+    需要保留或修改結果的呼叫端請自行 copy()。
+    
     Args:
         frame1: 第一個影像
         frame2: 第二個影像
@@ -177,12 +308,31 @@ def create_split_screen(
         合併後的影像
     """
     try:
-        if orientation == 'horizontal':
-            combined = np.hstack((frame1, frame2))
+        horizontal = orientation == 'horizontal'
+        key = (frame1.shape, frame2.shape, frame1.dtype, horizontal)
+        
+        canvas = _CANVAS.get(key)
+        if canvas is None:
+            if horizontal:
+                if frame1.shape[0] != frame2.shape[0]:
+                    raise ValueError("Frames must have the same height")
+                shape = (frame1.shape[0], frame1.shape[1] + frame2.shape[1]) + frame1.shape[2:]
+            else:
+                if frame1.shape[1:] != frame2.shape[1:]:
+                    raise ValueError("Frames must have the same width")
+                shape = (frame1.shape[0] + frame2.shape[0],) + frame1.shape[1:]
+            canvas = _CANVAS[key] = np.empty(shape, dtype=frame1.dtype)
+        
+        if horizontal:
+            w1 = frame1.shape[1]
+            canvas[:, :w1] = frame1
+            canvas[:, w1:] = frame2
         else:
-            combined = np.vstack((frame1, frame2))
+            h1 = frame1.shape[0]
+            canvas[:h1] = frame1
+            canvas[h1:] = frame2
         
-        return combined
+        return canvas
         
     except Exception as e:
         logger.error(f"Error creating split screen: {e}", exc_info=True)
@@ -4,12 +4,17 @@ Logging configuration module.
 This module provides centralized logging setup for the emotion analysis system.
 """
 
+import atexit
 import logging
+import queue
 import sys
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from config import LogConfig, PathConfig
 
+# Background listener that drains queued records into the real handlers
+_listener = None
+
 
 def setup_logging(
     log_level: str = None,
@@ -19,6 +24,11 @@ def setup_logging(
     """
     Setup logging configuration for the application.
     
+    The root logger only gets a QueueHandler, so a log call on a camera or
+    inference thread costs a queue append. A QueueListener thread does the
+    formatting, file writes and rotation. Call shutdown_logging() (also
+    registered with atexit) to flush pending records.
+    
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL).
                   If None, uses LOG_LEVEL from config.
@@ -28,6 +38,8 @@ def setup_logging(
     Returns:
         Configured root logger.
     """
+    global _listener
+    
     # Use config defaults if not specified
     if log_level is None:
         log_level = LogConfig.LOG_LEVEL
@@ -42,7 +54,8 @@ def setup_logging(
     logger = logging.getLogger()
     logger.setLevel(getattr(logging, log_level.upper()))
     
-    # Clear any existing handlers
+    # Clear any existing handlers (and stop a previous listener)
+    shutdown_logging()
     logger.handlers.clear()
     
     # Create formatters
@@ -61,14 +74,20 @@ def setup_logging(
     )
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    handlers = [file_handler]
     
     # Console handler (if enabled)
     if console:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(getattr(logging, log_level.upper()))
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
+    
+    # Hand records to the real handlers on a background thread
+    log_queue = queue.Queue(-1)
+    logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
     
     # Log startup message
     logger.info("="*60)
@@ -80,6 +99,24 @@ def setup_logging(
     return logger
 
 
+def shutdown_logging() -> None:
+    """
+    Stop the background logging listener, flushing any queued records.
+    
+    Safe to call more than once.
+    """
+    global _listener
+    
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger for a specific module.
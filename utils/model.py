@@ -1,33 +1,231 @@
 """
 模型載入工具模組
 
-提供載入 Keras 模型和標籤的功能。
+提供載入 Keras 模型和標籤的功能，並可選擇轉換為 TFLite 執行。
 """
+import os
 import time
 from pathlib import Path
-from typing import Tuple, List
+from typing import Iterable, Optional, Tuple, List, Union
+import cv2
+import numpy as np
 from keras.models import load_model as keras_load_model, Model
 
 from config import Config
 from utils.logging_config import get_logger
+from utils.classification import preprocess_frame
 from exceptions import ModelLoadError
 
 logger = get_logger(__name__)
 
+# 載入時預熱的批次大小：單一攝影機與雙攝影機批次推論
+WARMUP_BATCH_SIZES = (1, 2)
+
+
+class TFLiteModel:
+    """
+    TFLite Interpreter 包裝器
+    
+    提供與 Keras 模型相同的呼叫介面（model(x, training=False) 與
+    predict(x)），讓 classify_frame 等呼叫端不需關心實際執行環境。
+    XNNPACK 委派在 TFLite 浮點模型上預設啟用。
+    
+    INT8 全整數模型的輸入型別為 uint8（input_dtype），呼叫端可直接餵入
+    縮放後的原始像素，由量化參數完成 [-1, 1] 正規化；若傳入已正規化的
+    float 張量，則依輸入量化參數換算。
+    
+    每個批次大小各持有一個已配置好的 Interpreter，推論批次在 1 與 2
+    之間切換時直接取用，不會在熱路徑重新配置張量。
+    
+    注意：Interpreter 非執行緒安全，同一實例只應由單一執行緒呼叫。
+    """
+    
+    def __init__(self, model_content: bytes, num_threads: int = None):
+        """
+        初始化 TFLite 模型
+        
+        Args:
+            model_content: 轉換後的 TFLite flatbuffer
+            num_threads: 推論執行緒數（預設為 CPU 核心數）
+        """
+        self._model_content = model_content
+        self._num_threads = num_threads or os.cpu_count()
+        # 每個批次大小各自一個 Interpreter，批次在 1/2 間切換時不必重新配置張量
+        self._interpreters = {}
+        
+        self.interpreter = self._create_interpreter()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._interpreters[int(self._input['shape'][0])] = self.interpreter
+        
+        self.input_dtype = self._input['dtype']
+        self.input_shape = (None, *(int(d) for d in self._input['shape'][1:]))
+    
+    def _create_interpreter(self, batch_size: int = None):
+        """
+        建立並配置 Interpreter
+        
+        Args:
+            batch_size: 輸入批次大小（None 表示沿用模型原本的形狀）
+        """
+        import tensorflow as tf
+        
+        interpreter = tf.lite.Interpreter(
+            model_content=self._model_content,
+            num_threads=self._num_threads
+        )
+        if batch_size is not None:
+            input_details = interpreter.get_input_details()[0]
+            shape = list(input_details['shape'])
+            shape[0] = batch_size
+            interpreter.resize_tensor_input(input_details['index'], shape)
+        interpreter.allocate_tensors()
+        return interpreter
+    
+    def get_interpreter(self, batch_size: int):
+        """
+        取得指定批次大小的 Interpreter（首次使用時建立並快取）
+        
+        Args:
+            batch_size: 輸入批次大小
+        """
+        interpreter = self._interpreters.get(batch_size)
+        if interpreter is None:
+            interpreter = self._create_interpreter(batch_size)
+            self._interpreters[batch_size] = interpreter
+        return interpreter
+    
+    def __call__(self, x: np.ndarray, training: bool = False) -> np.ndarray:
+        """
+        執行推論
+        
+        Args:
+            x: 輸入張量 (batch, height, width, 3)
+            training: 為相容 Keras 介面而保留，忽略
+            
+        Returns:
+            模型輸出 (batch, num_classes)
+        """
+        if self.input_dtype == np.uint8 and x.dtype != np.uint8:
+            # 已正規化的 float 輸入：依量化參數轉回 uint8
+            scale, zero_point = self._input['quantization']
+            x = np.clip(np.rint(x / scale + zero_point), 0, 255)
+        x = np.asarray(x, dtype=self.input_dtype)
+        
+        interpreter = self.get_interpreter(x.shape[0])
+        interpreter.set_tensor(self._input['index'], x)
+        interpreter.invoke()
+        return interpreter.get_tensor(self._output['index'])
+    
+    def predict(self, x: np.ndarray, verbose: int = 0) -> np.ndarray:
+        """Keras 相容介面"""
+        return self(x)
+
+
+def load_calibration_frames(
+    calibration_dir: Path,
+    max_frames: int = 200
+) -> List[np.ndarray]:
+    """
+    載入 INT8 量化校正用的攝影機畫面
+    
+    Args:
+        calibration_dir: 存放校正影像（jpg/png）的目錄
+        max_frames: 最多載入的影像數
+        
+    Returns:
+        BGR 影像列表（目錄不存在時為空列表）
+    """
+    calibration_dir = Path(calibration_dir)
+    if not calibration_dir.is_dir():
+        return []
+    
+    frames = []
+    for path in sorted(calibration_dir.iterdir()):
+        if path.suffix.lower() not in ('.jpg', '.jpeg', '.png'):
+            continue
+        frame = cv2.imread(str(path))
+        if frame is not None:
+            frames.append(frame)
+        if len(frames) >= max_frames:
+            break
+    
+    return frames
+
+
+def convert_to_tflite(
+    model: Model,
+    precision: str = 'fp32',
+    calibration_frames: Optional[Iterable[np.ndarray]] = None
+) -> TFLiteModel:
+    """
+    將 Keras 模型轉換為 TFLite 並建立 Interpreter
+    
+    Args:
+        model: 已載入的 Keras 模型
+        precision: 'fp32'、'fp16'（權重半精度）或 'int8'（全整數訓練後量化）
+        calibration_frames: INT8 量化校正用的 BGR 畫面
+        
+    Returns:
+        TFLiteModel 包裝器
+        
+    Raises:
+        ValueError: 如果 precision 無效或 INT8 缺少校正畫面
+    """
+    import tensorflow as tf
+    
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    
+    if precision == 'fp16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+        
+    elif precision == 'int8':
+        frames = list(calibration_frames or [])
+        if not frames:
+            raise ValueError("INT8 quantization requires calibration frames")
+        
+        def representative_dataset():
+            # 全黑/全白畫面把輸入量化範圍固定在 [-1, 1]，
+            # 使 uint8 像素與量化值一一對應
+            for value in (0, 255):
+                yield [preprocess_frame(np.full_like(frames[0], value)).copy()]
+            for frame in frames:
+                yield [preprocess_frame(frame).copy()]
+        
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # uint8 輸入：量化參數即對應 x / 127.5 - 1，熱路徑不再需要浮點正規化
+        converter.inference_input_type = tf.uint8
+        
+    elif precision != 'fp32':
+        raise ValueError(f"Unsupported model precision: {precision}")
+    
+    tflite_model = TFLiteModel(converter.convert())
+    
+    logger.info(f"Model converted to TFLite ({precision})")
+    return tflite_model
+
 
 def load_keras_model(
     max_retries: int = 3,
-    retry_delay: float = 1.0
-) -> Tuple[Model, List[str]]:
+    retry_delay: float = 1.0,
+    runtime: str = None,
+    precision: str = None
+) -> Tuple[Union[Model, TFLiteModel], List[str]]:
     """
     載入 Keras 模型和類別標籤
     
     Args:
         max_retries: 最大重試次數
         retry_delay: 重試延遲（秒）
+        runtime: 推論執行環境 'keras' 或 'tflite'（預設讀取 Config）
+        precision: 'fp32'、'fp16' 或 'int8'（預設讀取 Config）；
+            非 fp32 時一律以 TFLite 執行
         
     Returns:
-        Tuple[Model, List[str]]: (模型, 類別名稱列表)
+        Tuple[Union[Model, TFLiteModel], List[str]]: (模型, 類別名稱列表)
         
     Raises:
         ModelLoadError: 如果載入失敗
@@ -35,6 +233,12 @@ def load_keras_model(
     config = Config()
     model_path = config.paths.KERAS_MODEL_PATH
     labels_path = config.paths.LABELS_PATH
+    if runtime is None:
+        runtime = config.analysis.MODEL_RUNTIME
+    if precision is None:
+        precision = config.analysis.MODEL_PRECISION
+    if precision != 'fp32':
+        runtime = 'tflite'
     
     for attempt in range(max_retries):
         try:
@@ -51,6 +255,29 @@ def load_keras_model(
             model = keras_load_model(str(model_path), compile=False)
             logger.info("Model loaded successfully")
             
+            if runtime == 'tflite':
+                calibration_frames = None
+                if precision == 'int8':
+                    calibration_frames = load_calibration_frames(
+                        config.paths.CALIBRATION_DIR
+                    )
+                model = convert_to_tflite(model, precision, calibration_frames)
+            
+            # 預熱：先以批次 1（單攝影機）與 2（雙攝影機批次推論）各執行一次
+            # 前向運算，讓追蹤/編譯成本不落在第一個即時畫面；TFLite 模型
+            # 會在此建立並配置各批次大小專屬的 Interpreter
+            input_dtype = getattr(model, 'input_dtype', np.float32)
+            for batch_size in WARMUP_BATCH_SIZES:
+                t0 = time.perf_counter()
+                model(np.zeros((batch_size, 224, 224, 3), dtype=input_dtype), training=False)
+                logger.info(
+                    f"Warmup forward pass (batch={batch_size}) took "
+                    f"{(time.perf_counter() - t0) * 1000:.1f} ms"
+                )
+            
+            # 預處理也先跑一次（啟用 Numba 核心時在此完成 JIT 編譯）
+            preprocess_frame(np.zeros((480, 640, 3), dtype=np.uint8))
+            
             # 載入標籤
             with open(labels_path, 'r', encoding='utf-8') as f:
                 class_names = [line.strip() for line in f.readlines()]
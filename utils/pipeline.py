@@ -0,0 +1,442 @@
+"""
+影像處理管線模組
+
+將「擷取 → 預處理 → 推論」拆成獨立執行緒的階段，以有界佇列串接，
+讓各階段重疊執行：總延遲從各階段相加變成由最慢階段決定吞吐量。
+
+- PreprocWorker：每個攝影機一個，等待新幀並縮放/正規化成模型輸入張量
+- InferenceWorker：所有攝影機共用，將各自最新的張量合併成一個批次推論
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.classification import (
+    preprocess_frame,
+    classify_tensors,
+    frame_hash,
+    get_cached_classification,
+    cache_classification
+)
+from utils.logging_config import get_logger
+from utils.threaded_camera import ThreadedCamera
+
+logger = get_logger(__name__)
+
+
+class PreprocWorker:
+    """
+    攝影機預處理工作執行緒
+
+    以 ThreadedCamera.read_new() 等待新幀，預處理後將 (序號, 張量) 放入
+    有界佇列。佇列滿時丟棄最舊的項目，確保消費端永遠拿到最新的張量，
+    不會累積延遲。
+
+    Example:
+        >>> worker = PreprocWorker('customer', camera, frame_skip=3)
+        >>> worker.start()
+        >>> item = worker.get(timeout=0.1)
+        >>> if item:
+        >>>     seq, tensor = item
+        >>> worker.stop()
+    """
+
+    def __init__(
+        self,
+        name: str,
+        camera: ThreadedCamera,
+        target_size: Tuple[int, int] = (224, 224),
+        normalize: bool = True,
+        frame_skip: int = 1,
+        queue_size: int = 2,
+        ready_event: Optional[threading.Event] = None
+    ):
+        """
+        初始化 PreprocWorker
+
+        Args:
+            name: 攝影機名稱
+            camera: 已啟動的 ThreadedCamera
+            target_size: 模型輸入尺寸 (width, height)
+            normalize: 是否正規化到 [-1, 1]（INT8 模型為 False）
+            frame_skip: 每隔幾個新幀預處理一次
+            queue_size: 輸出佇列大小
+            ready_event: 每放入一個張量就 set() 的事件（供下游等待）
+        """
+        self.name = name
+        self.camera = camera
+        self.target_size = target_size
+        self.normalize = normalize
+        self.frame_skip = max(1, frame_skip)
+        self.ready_event = ready_event
+
+        self.queue = queue.Queue(maxsize=queue_size)
+
+        # Threading
+        self.running = False
+        self.thread = None
+
+        # Statistics
+        self.frame_counter = 0
+        self.processed_frames = 0
+        self.dropped_frames = 0
+        self.preprocess_times_ns = deque(maxlen=1000)
+
+        width, height = target_size
+        self._tensor_shape = (1, height, width, 3)
+        self._tensor_dtype = np.float32 if normalize else np.uint8
+
+        logger.info(
+            f"PreprocWorker '{name}' initialized "
+            f"(target={width}x{height}, frame_skip={frame_skip}, queue={queue_size})"
+        )
+
+    def start(self):
+        """啟動預處理執行緒"""
+        if self.running:
+            logger.warning(f"[{self.name}] PreprocWorker already running")
+            return
+
+        self.running = True
+        self.thread = threading.Thread(
+            target=self._worker_loop, daemon=True, name=f"Preproc-{self.name}"
+        )
+        self.thread.start()
+        logger.info(f"[{self.name}] PreprocWorker thread started")
+
+    def stop(self, timeout: float = 2.0):
+        """
+        停止預處理執行緒
+
+        Args:
+            timeout: 等待執行緒結束的最大時間（秒）
+        """
+        if not self.running:
+            return
+
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            if self.thread.is_alive():
+                logger.warning(f"[{self.name}] PreprocWorker did not stop within {timeout}s")
+            else:
+                logger.info(f"[{self.name}] PreprocWorker thread stopped")
+
+    def _put_latest(self, item: Tuple[int, np.ndarray]):
+        """
+        放入佇列；佇列已滿時丟棄最舊的項目
+
+        Args:
+            item: (序號, 張量)
+        """
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped_frames += 1
+                except queue.Empty:
+                    pass
+
+    def _worker_loop(self):
+        """執行緒主循環：等待新幀並預處理"""
+        last_seq = 0
+
+        while self.running:
+            ok, frame, seq = self.camera.read_new(last_seq, timeout=0.5)
+            if not ok:
+                if not self.camera.running:
+                    time.sleep(0.1)
+                continue
+            last_seq = seq
+
+            self.frame_counter += 1
+            if self.frame_counter % self.frame_skip != 0:
+                continue
+
+            try:
+                t0 = time.perf_counter_ns()
+                # 每個張量使用獨立的陣列：消費端可能在下一幀預處理時仍持有它
+                tensor = preprocess_frame(
+                    frame,
+                    self.target_size,
+                    out=np.empty(self._tensor_shape, dtype=self._tensor_dtype),
+                    normalize=self.normalize
+                )
+                self.preprocess_times_ns.append(time.perf_counter_ns() - t0)
+            except Exception as e:
+                logger.error(f"[{self.name}] Preprocessing failed: {e}")
+                continue
+
+            self._put_latest((seq, tensor))
+            self.processed_frames += 1
+
+            if self.ready_event is not None:
+                self.ready_event.set()
+
+    def get(self, timeout: Optional[float] = 0.0) -> Optional[Tuple[int, np.ndarray]]:
+        """
+        取出下一個預處理完成的張量
+
+        Args:
+            timeout: 最大等待時間（秒）；0 表示不等待，None 表示無限等待
+
+        Returns:
+            (序號, 張量 (1, H, W, 3))，無可用張量時為 None
+        """
+        try:
+            if timeout == 0:
+                return self.queue.get_nowait()
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        取得預處理統計資料
+
+        Returns:
+            Dictionary containing:
+            - processed_frames: 已預處理的幀數
+            - dropped_frames: 因佇列已滿而丟棄的張量數
+            - queue_depth: 目前佇列中的張量數
+            - average_preprocess_time: 平均預處理時間（秒，最近 1000 幀）
+        """
+        times_ns = list(self.preprocess_times_ns)
+        avg_time = sum(times_ns) / len(times_ns) * 1e-9 if times_ns else 0.0
+
+        return {
+            'processed_frames': self.processed_frames,
+            'dropped_frames': self.dropped_frames,
+            'queue_depth': self.queue.qsize(),
+            'average_preprocess_time': avg_time
+        }
+
+
+class InferenceWorker:
+    """
+    跨攝影機批次推論工作執行緒
+
+    從每個攝影機的預處理佇列取出最新的張量，合併成 (N, H, W, 3) 批次後
+    只做一次前向運算，再依攝影機名稱把結果放回各自的輸出佇列。
+    張量的平均雜湊與該攝影機上次推論時幾乎相同時（FRAME_HASH_SKIP），
+    直接沿用上次結果，不放入批次。
+    模型只在這個執行緒中呼叫（TFLite Interpreter 非執行緒安全）。
+
+    Example:
+        >>> ready = threading.Event()
+        >>> workers = {name: PreprocWorker(name, cam, ready_event=ready) ...}
+        >>> inference = InferenceWorker(
+        >>>     model, class_names,
+        >>>     {name: w.queue for name, w in workers.items()},
+        >>>     ready_event=ready
+        >>> )
+        >>> inference.start()
+        >>> result = inference.get_result('customer')
+        >>> if result:
+        >>>     seq, class_name, confidence = result
+    """
+
+    def __init__(
+        self,
+        model,
+        class_names: List[str],
+        input_qs: Dict[str, queue.Queue],
+        ready_event: Optional[threading.Event] = None
+    ):
+        """
+        初始化 InferenceWorker
+
+        Args:
+            model: 已載入的 Keras 模型（或 TFLiteModel）
+            class_names: 類別名稱列表
+            input_qs: 攝影機名稱 -> PreprocWorker.queue
+            ready_event: 與 PreprocWorker 共用的事件；未提供時以輪詢等待
+        """
+        self.model = model
+        self.class_names = class_names
+        self.input_qs = input_qs
+        self.ready_event = ready_event or threading.Event()
+
+        # 每個攝影機只保留最新一筆結果
+        self.output_qs = {name: queue.Queue(maxsize=1) for name in input_qs}
+
+        # Threading
+        self.running = False
+        self.thread = None
+
+        # Statistics
+        self.total_batches = 0
+        self.total_samples = 0
+        self.failed_batches = 0
+        self.cache_hits = 0
+        self.inference_times_ns = deque(maxlen=1000)
+
+        logger.info(f"InferenceWorker initialized for cameras: {list(input_qs)}")
+
+    def start(self):
+        """啟動推論執行緒"""
+        if self.running:
+            logger.warning("InferenceWorker already running")
+            return
+
+        self.running = True
+        self.thread = threading.Thread(
+            target=self._worker_loop, daemon=True, name="Inference"
+        )
+        self.thread.start()
+        logger.info("InferenceWorker thread started")
+
+    def stop(self, timeout: float = 2.0):
+        """
+        停止推論執行緒
+
+        Args:
+            timeout: 等待執行緒結束的最大時間（秒）
+        """
+        if not self.running:
+            return
+
+        self.running = False
+        self.ready_event.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+            if self.thread.is_alive():
+                logger.warning(f"InferenceWorker did not stop within {timeout}s")
+            else:
+                logger.info("InferenceWorker thread stopped")
+
+    def _collect_batch(self) -> Tuple[List[str], List[int], List[np.ndarray]]:
+        """
+        從每個輸入佇列取出最新的張量（較舊的直接略過）
+
+        Returns:
+            (攝影機名稱列表, 序號列表, 張量列表)
+        """
+        names, seqs, tensors = [], [], []
+        for name, q in self.input_qs.items():
+            item = None
+            while True:
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    break
+            if item is not None:
+                names.append(name)
+                seqs.append(item[0])
+                tensors.append(item[1])
+        return names, seqs, tensors
+
+    def _put_result(self, name: str, result: Tuple[int, str, float]):
+        """
+        放入輸出佇列；尚未被取走的舊結果直接取代
+
+        Args:
+            name: 攝影機名稱
+            result: (序號, 類別名稱, 信心分數)
+        """
+        q = self.output_qs[name]
+        while True:
+            try:
+                q.put_nowait(result)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _worker_loop(self):
+        """執行緒主循環：收集各攝影機張量並批次推論"""
+        while self.running:
+            if not self.ready_event.wait(timeout=0.1):
+                continue
+            self.ready_event.clear()
+
+            names, seqs, tensors = self._collect_batch()
+            if not names:
+                continue
+
+            # 畫面幾乎沒變的攝影機直接沿用上次結果，其餘才進入批次
+            now = time.monotonic()
+            batch_names, batch_seqs, batch_tensors, hashes = [], [], [], []
+            for name, seq, tensor in zip(names, seqs, tensors):
+                h = frame_hash(tensor[0])
+                cached = get_cached_classification(name, h, now)
+                if cached is not None:
+                    self.cache_hits += 1
+                    self._put_result(name, (seq, *cached))
+                    continue
+                batch_names.append(name)
+                batch_seqs.append(seq)
+                batch_tensors.append(tensor)
+                hashes.append(h)
+
+            if not batch_names:
+                continue
+
+            try:
+                t0 = time.perf_counter_ns()
+                classifications = classify_tensors(
+                    np.concatenate(batch_tensors), self.model, self.class_names
+                )
+                self.inference_times_ns.append(time.perf_counter_ns() - t0)
+            except ValueError as e:
+                self.failed_batches += 1
+                logger.error(f"Batch inference failed: {e}")
+                continue
+
+            self.total_batches += 1
+            self.total_samples += len(batch_names)
+
+            for name, seq, h, (class_name, confidence) in zip(
+                batch_names, batch_seqs, hashes, classifications
+            ):
+                cache_classification(name, h, class_name, confidence, now)
+                self._put_result(name, (seq, class_name, confidence))
+
+    def get_result(self, name: str) -> Optional[Tuple[int, str, float]]:
+        """
+        取出指定攝影機的最新分類結果（非阻塞）
+
+        Args:
+            name: 攝影機名稱
+
+        Returns:
+            (序號, 類別名稱, 信心分數)，沒有新結果時為 None
+        """
+        try:
+            return self.output_qs[name].get_nowait()
+        except queue.Empty:
+            return None
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        取得推論統計資料
+
+        Returns:
+            Dictionary containing:
+            - total_batches: 已完成的批次數
+            - failed_batches: 失敗的批次數
+            - average_batch_size: 平均批次大小
+            - cache_hits: 因畫面未變而沿用上次結果的次數
+            - average_inference_time: 平均每批推論時間（秒，最近 1000 批）
+        """
+        times_ns = list(self.inference_times_ns)
+        avg_time = sum(times_ns) / len(times_ns) * 1e-9 if times_ns else 0.0
+        avg_batch = self.total_samples / self.total_batches if self.total_batches else 0.0
+
+        return {
+            'total_batches': self.total_batches,
+            'failed_batches': self.failed_batches,
+            'average_batch_size': avg_batch,
+            'cache_hits': self.cache_hits,
+            'average_inference_time': avg_time
+        }
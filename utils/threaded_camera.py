@@ -8,7 +8,7 @@ Threaded Camera Module for Optimized Video Capture
 
 核心優化：
 1. 獨立執行緒持續讀取攝影機（非阻塞）
-2. Buffer size 限制為 2（防止延遲堆積）
+2. Buffer size 限制為 1（永遠取得最新幀，防止延遲堆積）
 3. 異步初始化（不阻塞主程式）
 4. 自動預熱機制
 """
@@ -34,7 +34,8 @@ class ThreadedCamera:
 
     Features:
     - 非阻塞幀讀取（always get latest frame）
-    - Buffer size 優化（CAP_PROP_BUFFERSIZE=2）
+    - Buffer size 優化（CAP_PROP_BUFFERSIZE=1）
+    - 新幀通知（read_new 以條件變數等待，不需輪詢）
     - 異步初始化（快速啟動）
     - 自動預熱機制
 
@@ -56,7 +57,7 @@ class ThreadedCamera:
         width: int = 640,
         height: int = 480,
         fps: int = 30,
-        buffer_size: int = 2,
+        buffer_size: int = 1,
         warmup_frames: int = 5
     ):
         """
@@ -82,14 +83,20 @@ class ThreadedCamera:
         self.frame = None
         self.status = False
         self.running = False
+        self._seq = 0
 
         # Threading
         self.thread = None
         self.lock = threading.Lock()
+        self._cond = threading.Condition(self.lock)
 
         # Performance tracking
         self.frame_count = 0
         self.start_time = None
+        self._capture_ts = None          # 目前幀的擷取時間（monotonic）
+        self._read_latency_ewma = 0.0    # 擷取到被讀取的延遲 EWMA（秒）
+        self.dropped_frames = 0          # read_new 呼叫端錯過的幀數（累計）
+        self._last_seq_gap = 0           # 最近一次 read_new 錯過的幀數
 
         logger.info(
             f"ThreadedCamera initialized for camera {camera_id} "
@@ -112,7 +119,7 @@ class ThreadedCamera:
             if not self.capture.isOpened():
                 raise CameraOpenError(f"Failed to open camera {self.camera_id}")
 
-            # 關鍵優化：設定 buffer size 為 2（防止 frame 堆積）
+            # 關鍵優化：設定 buffer size 為 1（防止 frame 堆積）
             self.capture.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
 
             # 設定解析度和 FPS
@@ -172,29 +179,37 @@ class ThreadedCamera:
         執行緒主循環：持續讀取最新幀
 
         這個方法在獨立執行緒中運行，持續從攝影機讀取幀。
+        capture.read() 會阻塞直到下一幀就緒，因此由它控制節奏，
+        只有在讀取失敗時才短暫休眠避免空轉。
         """
         logger.info(f"Camera {self.camera_id} update thread running")
 
         while self.running:
             if self.capture and self.capture.isOpened():
                 try:
-                    # 讀取幀
+                    # 讀取幀（每次都是新配置的陣列，已發佈的幀不會被覆寫）
                     status, frame = self.capture.read()
 
-                    # 使用 lock 保護共享資源
-                    with self.lock:
+                    # 使用 lock 保護共享資源：只交換參考，不複製
+                    with self._cond:
                         self.status = status
                         if status:
                             self.frame = frame
+                            self._capture_ts = time.monotonic()
+                            self._seq += 1
                             self.frame_count += 1
+                            self._cond.notify_all()
+
+                    if status:
+                        continue
 
                 except Exception as e:
-                    logger.error(f"Error reading frame from camera {self.camera_id}: {e}")
+                    logger.error("Error reading frame from camera %s: %s", self.camera_id, e)
                     with self.lock:
                         self.status = False
 
-            # 小延遲以避免 CPU 100%（根據目標 FPS）
-            time.sleep(1.0 / (self.fps * 2))  # 稍微快於目標 FPS
+            # 讀取失敗或攝影機未開啟時才休眠，避免 CPU 100%
+            time.sleep(1.0 / self.fps)
 
         logger.info(f"Camera {self.camera_id} update thread stopped")
 
@@ -202,11 +217,70 @@ class ThreadedCamera:
         """
         讀取最新幀（非阻塞）
 
+        回傳的是最新幀本身而非副本：讀取執行緒每次都寫入新陣列並只交換
+        參考，因此已回傳的幀不會被之後的擷取覆寫。同一幀可能被多次
+        read() 取得，需要就地修改的呼叫端請自行 copy()。
+
         Returns:
             Tuple[bool, Optional[np.ndarray]]: (成功與否, 影像幀)
         """
         with self.lock:
-            return self.status, self.frame.copy() if self.frame is not None else None
+            self._record_read_latency()
+            return self.status, self.frame
+
+    def read_with_seq(self) -> Tuple[bool, Optional[np.ndarray], int]:
+        """
+        讀取最新幀及其序號（非阻塞）
+
+        序號每擷取一幀加一，呼叫端可比對序號判斷是否為已處理過的舊幀。
+
+        Returns:
+            Tuple[bool, Optional[np.ndarray], int]: (成功與否, 影像幀, 序號)
+        """
+        with self.lock:
+            self._record_read_latency()
+            return self.status, self.frame, self._seq
+
+    def read_new(
+        self,
+        last_seq: int,
+        timeout: Optional[float] = None
+    ) -> Tuple[bool, Optional[np.ndarray], int]:
+        """
+        等待比 last_seq 更新的幀（阻塞，直到新幀或逾時）
+
+        Args:
+            last_seq: 呼叫端上次處理的幀序號
+            timeout: 最大等待時間（秒），None 表示無限等待
+
+        Returns:
+            Tuple[bool, Optional[np.ndarray], int]: (是否取得新幀, 影像幀, 序號)；
+            逾時或攝影機停止時回傳 (False, 目前的幀, 目前的序號)
+        """
+        with self._cond:
+            # stop() 也會喚醒等待者，避免無限等待已停止的攝影機
+            self._cond.wait_for(
+                lambda: self._seq > last_seq or not self.running, timeout
+            )
+            got_new = self._seq > last_seq
+            if got_new:
+                self._record_read_latency()
+                if last_seq > 0:
+                    self._last_seq_gap = self._seq - last_seq - 1
+                    self.dropped_frames += self._last_seq_gap
+            return got_new and self.status, self.frame, self._seq
+
+    def _record_read_latency(self, alpha: float = 0.1):
+        """
+        更新「擷取 → 讀取」延遲的 EWMA（呼叫端需持有 lock）
+
+        Args:
+            alpha: EWMA 平滑係數
+        """
+        if self._capture_ts is None:
+            return
+        latency = time.monotonic() - self._capture_ts
+        self._read_latency_ewma += alpha * (latency - self._read_latency_ewma)
 
     def is_opened(self) -> bool:
         """
@@ -230,14 +304,37 @@ class ThreadedCamera:
         elapsed = time.time() - self.start_time
         return self.frame_count / elapsed if elapsed > 0 else 0.0
 
+    def get_stats(self) -> dict:
+        """
+        取得擷取統計資料（用於調整 buffer_size 與佇列大小）
+
+        Returns:
+            Dictionary containing:
+            - fps: 實際擷取 FPS
+            - avg_read_latency_ms: 擷取到被讀取的平均延遲（EWMA，毫秒）
+            - dropped_frames: read_new 呼叫端累計錯過的幀數
+            - seq_gap: 最近一次 read_new 錯過的幀數
+            - thread_alive: 擷取執行緒是否仍在執行
+        """
+        with self.lock:
+            return {
+                'fps': self.get_fps(),
+                'avg_read_latency_ms': self._read_latency_ewma * 1000,
+                'dropped_frames': self.dropped_frames,
+                'seq_gap': self._last_seq_gap,
+                'thread_alive': self.thread is not None and self.thread.is_alive()
+            }
+
     def stop(self):
         """
         停止攝影機執行緒
         """
         logger.info(f"Stopping camera {self.camera_id}...")
 
-        # 停止執行緒
-        self.running = False
+        # 停止執行緒並喚醒等待新幀的呼叫端
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
 
         # 等待執行緒結束
         if self.thread and self.thread.is_alive():
@@ -288,6 +385,7 @@ class AsyncCameraInitializer:
         self.error = None
         self.done = False
         self.lock = threading.Lock()
+        self.init_time = None  # 開啟攝影機所花時間（秒）
 
         logger.info("AsyncCameraInitializer created")
 
@@ -301,11 +399,13 @@ class AsyncCameraInitializer:
         """
         try:
             logger.info(f"Async initialization started for camera {camera_id}")
+            t0 = time.monotonic()
 
             camera = ThreadedCamera(camera_id=camera_id, **kwargs)
             success = camera.start()
 
             with self.lock:
+                self.init_time = time.monotonic() - t0
                 if success:
                     self.camera = camera
                     logger.info(f"Async initialization completed for camera {camera_id}")
@@ -349,6 +449,30 @@ class AsyncCameraInitializer:
         with self.lock:
             return self.done and self.camera is not None
 
+    def get_stats(self) -> dict:
+        """
+        取得初始化統計資料
+
+        Returns:
+            Dictionary containing:
+            - done: 初始化是否已結束
+            - ready: 攝影機是否可用
+            - init_time: 開啟攝影機所花時間（秒，未完成時為 None）
+            - error: 錯誤訊息（若有）
+            - camera: 攝影機的 get_stats()（可用時）
+        """
+        with self.lock:
+            camera = self.camera
+            stats = {
+                'done': self.done,
+                'ready': self.done and camera is not None,
+                'init_time': self.init_time,
+                'error': self.error,
+            }
+
+        stats['camera'] = camera.get_stats() if camera else None
+        return stats
+
     def wait_for_camera(self, timeout: float = 10.0) -> Optional[ThreadedCamera]:
         """
         等待攝影機開啟完成
@@ -3,56 +3,530 @@
 
 提供視訊錄製和格式轉換功能。
 """
+import queue
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from functools import lru_cache
 import cv2
 import ffmpeg
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Union
 
 from config import Config
 from utils.logging_config import get_logger
 from exceptions import EmotionAnalysisError
 
+try:
+    import PyNvVideoCodec as pnvc
+    HAS_PYNVC = True
+except ImportError:
+    pnvc = None
+    HAS_PYNVC = False
+
 logger = get_logger(__name__)
 
 
+class CudaVideoWriter:
+    """
+    cv2.cudacodec 硬體編碼寫入器的轉接器
+    
+    提供與 cv2.VideoWriter 相同的 write()/release()/isOpened() 介面：
+    write() 將 BGR 影格上傳到重複使用的 GpuMat 後交給 NVENC 編碼
+    (H.264 或 HEVC)。
+    """
+    
+    def __init__(self, output_path: str, fps: int, frame_size: tuple, codec: str = 'H264'):
+        """
+        初始化 CudaVideoWriter
+        
+        Args:
+            output_path: 輸出檔案路徑
+            fps: 影格率
+            frame_size: 影格尺寸 (width, height)
+            codec: cv2.cudacodec 編碼格式名稱（'H264' 或 'HEVC'）
+            
+        Raises:
+            cv2.error: 如果無法建立 GPU 編碼器
+        """
+        self._writer = cv2.cudacodec.createVideoWriter(
+            output_path, frame_size, getattr(cv2.cudacodec, codec), fps,
+            cv2.cudacodec.ColorFormat_BGR
+        )
+        self._gpu_frame = cv2.cuda_GpuMat()
+        self._opened = True
+    
+    def isOpened(self) -> bool:
+        """是否仍可寫入"""
+        return self._opened
+    
+    def write(self, frame):
+        """
+        上傳並編碼一個影格
+        
+        Args:
+            frame: BGR 影像 (H, W, 3)
+        """
+        self._gpu_frame.upload(frame)
+        self._writer.write(self._gpu_frame)
+    
+    def release(self):
+        """完成編碼並關閉檔案"""
+        if self._opened:
+            self._writer.release()
+            self._opened = False
+
+
+# fourcc -> cv2.cudacodec 編碼格式；其他 fourcc 不走 GPU 寫入器
+_CUDA_CODECS = {
+    'H264': 'H264', 'AVC1': 'H264', 'X264': 'H264',
+    'HEVC': 'HEVC', 'H265': 'HEVC', 'HVC1': 'HEVC',
+}
+
+
+def _has_cuda_writer() -> bool:
+    """
+    檢查 OpenCV 是否以 CUDA + cudacodec 建置且有可用的 GPU
+    
+    Returns:
+        True 如果可以使用 CudaVideoWriter
+    """
+    if not hasattr(cv2, 'cudacodec'):
+        return False
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except cv2.error:
+        return False
+
+
+class ThreadedVideoWriter:
+    """
+    背景執行緒視訊寫入器
+    
+    write() 只把影格放入有界佇列，由背景執行緒交給實際的寫入器編碼，
+    擷取迴圈不再被單一影格的編碼延遲卡住。佇列已滿（編碼跟不上）時 write()
+    會阻塞等待，讓錄影不因丟格而變短、變快；只有等待超過 put_timeout
+    （編碼器卡住）才丟棄該影格並記錄警告。
+    
+    注意：影格以參考放入佇列，呼叫端在 write() 之後不可再修改該陣列
+    （ThreadedCamera.read() 每次擷取都是新陣列，可直接傳入）。
+    
+    Example:
+        >>> writer = ThreadedVideoWriter(cv2.VideoWriter(...))
+        >>> writer.write(frame)
+        >>> writer.release()  # 寫完佇列中剩餘的影格後關閉
+    """
+    
+    _SENTINEL = None
+    
+    def __init__(
+        self,
+        writer,
+        queue_size: int = 32,
+        name: str = 'VideoWriter',
+        put_timeout: float = 1.0
+    ):
+        """
+        初始化 ThreadedVideoWriter 並啟動背景執行緒
+        
+        Args:
+            writer: 已開啟的 cv2.VideoWriter 或 CudaVideoWriter
+            queue_size: 佇列大小（影格數）
+            name: 執行緒名稱
+            put_timeout: 佇列已滿時 write() 最多等待的秒數，逾時則丟棄影格
+        """
+        self.writer = writer
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.put_timeout = put_timeout
+        self.written_frames = 0
+        self.dropped_frames = 0
+        
+        self.thread = threading.Thread(target=self._worker_loop, daemon=True, name=name)
+        self.thread.start()
+    
+    def _worker_loop(self):
+        """執行緒主循環：依序編碼佇列中的影格，收到結束標記時離開"""
+        while True:
+            frame = self.queue.get()
+            if frame is self._SENTINEL:
+                break
+            try:
+                self.writer.write(frame)
+                self.written_frames += 1
+            except Exception as e:
+                logger.error(f"Error writing video frame: {e}")
+    
+    def isOpened(self) -> bool:
+        """背景執行緒是否仍在運作"""
+        return self.thread.is_alive()
+    
+    def write(self, frame):
+        """
+        將影格放入寫入佇列（佇列已滿時最多阻塞 put_timeout 秒）
+        
+        Args:
+            frame: BGR 影像 (H, W, 3)
+        """
+        try:
+            self.queue.put(frame, timeout=self.put_timeout)
+        except queue.Full:
+            self.dropped_frames += 1
+            if self.dropped_frames == 1:
+                logger.warning(
+                    f"[{self.thread.name}] Video encoder stalled for "
+                    f"{self.put_timeout}s, dropping frames"
+                )
+    
+    def release(self, timeout: float = 10.0):
+        """
+        寫完佇列中的影格後停止背景執行緒並釋放寫入器
+        
+        Args:
+            timeout: 等待執行緒結束的最大時間（秒）
+        """
+        if self.thread.is_alive():
+            self.queue.put(self._SENTINEL)
+            self.thread.join(timeout=timeout)
+            if self.thread.is_alive():
+                logger.warning(f"Video writer thread did not stop within {timeout}s")
+        
+        if self.dropped_frames:
+            logger.warning(
+                f"Video writer dropped {self.dropped_frames} frames "
+                f"({self.written_frames} written)"
+            )
+        self.writer.release()
+
+
+def _open_video_writer(
+    output_path: str,
+    fps: int,
+    frame_size: tuple,
+    fourcc_code: str,
+    backend: int,
+    params: Optional[List[int]]
+) -> Optional[Union[cv2.VideoWriter, CudaVideoWriter]]:
+    """
+    開啟實際的寫入器：優先 GPU，否則以指定後端開啟 cv2.VideoWriter
+    
+    Returns:
+        VideoWriter 或 CudaVideoWriter 物件，失敗則返回 None
+    """
+    # 只在要求的編碼格式 GPU 也能產生時使用 cudacodec（GStreamer 管線不適用），
+    # 不默默改掉呼叫端指定的 fourcc
+    cuda_codec = _CUDA_CODECS.get(fourcc_code.upper())
+    if backend == cv2.CAP_FFMPEG and cuda_codec and _has_cuda_writer():
+        if params:
+            logger.warning(
+                f"GPU video writer ignores writer params {params} for {output_path}"
+            )
+        try:
+            writer = CudaVideoWriter(output_path, fps, frame_size, cuda_codec)
+            logger.info(
+                f"GPU video writer created: {output_path} "
+                f"({frame_size[0]}x{frame_size[1]} @ {fps}fps)"
+            )
+            return writer
+        except cv2.error as e:
+            logger.warning(f"GPU video writer unavailable, using CPU writer: {e}")
+    
+    # GStreamer 管線由管線本身決定編碼器，fourcc 必須為 0
+    fourcc = 0 if backend == cv2.CAP_GSTREAMER else cv2.VideoWriter_fourcc(*fourcc_code)
+    writer = cv2.VideoWriter(output_path, backend, fourcc, fps, frame_size, params or [])
+    
+    if not writer.isOpened() and params:
+        # 例如要求硬體加速但此建置/主機不支援：改用預設參數重試
+        logger.warning(
+            f"Video writer rejected params {params} for {output_path}, retrying without"
+        )
+        writer = cv2.VideoWriter(output_path, backend, fourcc, fps, frame_size)
+    
+    if not writer.isOpened():
+        logger.error(f"Failed to open video writer for {output_path}")
+        return None
+    
+    logger.info(
+        f"Video writer created: {output_path} "
+        f"({frame_size[0]}x{frame_size[1]} @ {fps}fps, backend={writer.getBackendName()})"
+    )
+    
+    return writer
+
+
 def create_video_writer(
     output_path: str,
     fps: int,
     frame_size: tuple,
-    fourcc_code: str = 'XVID'
-) -> Optional[cv2.VideoWriter]:
+    fourcc_code: str = 'XVID',
+    threaded: bool = True,
+    backend: int = cv2.CAP_FFMPEG,
+    params: Optional[List[int]] = None
+) -> Optional[Union[ThreadedVideoWriter, cv2.VideoWriter, CudaVideoWriter]]:
     """
     建立視訊寫入器
     
+    fourcc_code 為 H.264/HEVC 且 OpenCV 以 CUDA 建置時優先使用 cudacodec
+    硬體編碼（此時 params 不適用），其他編碼格式或無法使用時以 backend
+    開啟 cv2.VideoWriter。
+    預設再包一層 ThreadedVideoWriter，讓編碼在背景執行緒進行。
+    
+    Example:
+        >>> # FFmpeg 後端 + 硬體加速（主機/建置不支援時自動退回軟體編碼）
+        >>> create_video_writer('out.mp4', 30, (1280, 720), 'H264', params=[
+        >>>     cv2.VIDEOWRITER_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY
+        >>> ])
+        >>> # Jetson：以 GStreamer 管線交給 nvv4l2h264enc
+        >>> create_video_writer(
+        >>>     'appsrc ! videoconvert ! nvvidconv ! nvv4l2h264enc ! h264parse '
+        >>>     '! qtmux ! filesink location=out.mp4',
+        >>>     30, (1280, 720), backend=cv2.CAP_GSTREAMER
+        >>> )
+    
     Args:
-        output_path: 輸出檔案路徑
+        output_path: 輸出檔案路徑（backend 為 CAP_GSTREAMER 時為管線字串）
         fps: 影格率
         frame_size: 影格尺寸 (width, height)
-        fourcc_code: 編碼格式 (如 'XVID', 'mp4v')
+        fourcc_code: 編碼格式 (如 'XVID', 'mp4v', 'H264', 'HEVC')
+        threaded: 是否以背景執行緒寫入
+        backend: cv2.VideoWriter 後端 (cv2.CAP_FFMPEG、cv2.CAP_GSTREAMER 等)
+        params: cv2.VideoWriter 參數 [prop_id, value, ...]
         
     Returns:
-        VideoWriter 物件，失敗則返回 None
+        寫入器物件（皆提供 write()/release()），失敗則返回 None
     """
     try:
-        fourcc = cv2.VideoWriter_fourcc(*fourcc_code)
-        writer = cv2.VideoWriter(output_path, fourcc, fps, frame_size)
-        
-        if not writer.isOpened():
-            logger.error(f"Failed to open video writer for {output_path}")
-            return None
-        
-        logger.info(
-            f"Video writer created: {output_path} "
-            f"({frame_size[0]}x{frame_size[1]} @ {fps}fps)"
+        writer = _open_video_writer(
+            output_path, fps, frame_size, fourcc_code, backend, params
         )
-        
-        return writer
+        if writer is None or not threaded:
+            return writer
+        name = Path(output_path).stem if backend != cv2.CAP_GSTREAMER else 'gstreamer'
+        return ThreadedVideoWriter(writer, name=f"VideoWriter-{name}")
         
     except Exception as e:
         logger.error(f"Error creating video writer: {e}", exc_info=True)
         return None
 
 
+@lru_cache(maxsize=1)
+def _has_nvenc() -> bool:
+    """
+    檢查 ffmpeg 是否支援 h264_nvenc 硬體編碼器（只探測一次）
+    
+    Returns:
+        True 如果 `ffmpeg -encoders` 列出 h264_nvenc
+    """
+    try:
+        result = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-encoders'],
+            capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    
+    available = 'h264_nvenc' in result.stdout
+    logger.info(f"NVENC encoder {'available' if available else 'not available'}")
+    return available
+
+
+# ffmpeg 指令列樣板（模組載入時建立一次；每次轉檔只需串接檔名與少數參數）
+_FFMPEG_BASE_ARGS = ('ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostats', '-y')
+_NVENC_INPUT_ARGS = ('-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda')
+_NVENC_OUTPUT_ARGS = (
+    '-c:v', 'h264_nvenc',
+    '-preset', Config().video.NVENC_PRESET,
+    '-rc', 'vbr',
+    '-cq', str(Config().video.NVENC_CQ),
+)
+_X264_OUTPUT_ARGS = (
+    '-c:v', 'libx264',
+    '-preset', Config().video.X264_PRESET,
+    '-crf', str(Config().video.X264_CRF),
+)
+_MP4_OUTPUT_ARGS = ('-movflags', '+faststart')
+
+
+def _run_ffmpeg(*args: str) -> None:
+    """
+    執行 ffmpeg 指令：只輸出錯誤訊息，stdout 直接丟棄
+    
+    以 -loglevel error -nostats 執行，成功時 stderr 幾乎沒有內容，不必在
+    Python 端緩衝整段進度/橫幅輸出；失敗時 stderr 即為診斷訊息。
+    指令列直接由樣板串接，不經過 ffmpeg-python 的節點圖。
+    
+    Args:
+        *args: 接在 _FFMPEG_BASE_ARGS 之後的參數（輸入、編碼參數、輸出檔）
+        
+    Raises:
+        ffmpeg.Error: 如果 ffmpeg 結束碼非 0（stderr 含錯誤訊息）
+    """
+    result = subprocess.run(
+        _FFMPEG_BASE_ARGS + args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    if result.returncode != 0:
+        raise ffmpeg.Error('ffmpeg', b'', result.stderr)
+
+
+# 可直接封裝進 MP4、不需重新編碼的編碼格式
+_MP4_VIDEO_CODECS = {'h264', 'hevc'}
+_MP4_AUDIO_CODECS = {'aac', 'mp3'}
+
+
+def _probe(input_file: str) -> dict:
+    """
+    以 ffprobe 讀取輸入檔所有串流的中繼資料（每次轉檔只執行一次）
+    
+    Args:
+        input_file: 輸入檔案路徑
+        
+    Returns:
+        ffprobe 結果字典，失敗則返回空字典
+    """
+    try:
+        return ffmpeg.probe(input_file)
+    except ffmpeg.Error as e:
+        logger.warning(
+            f"FFprobe error for {input_file}: {e.stderr.decode(errors='replace').strip()}"
+        )
+    except OSError as e:
+        logger.warning(f"FFprobe unavailable for {input_file}: {e}")
+    return {}
+
+
+def _can_stream_copy(probe: dict) -> bool:
+    """
+    檢查輸入檔是否已是 MP4 相容編碼（可直接 stream copy）
+    
+    Args:
+        probe: 輸入檔的 ffprobe 結果（_probe 的回傳值）
+        
+    Returns:
+        True 如果視訊為 H.264/HEVC，且沒有音訊或音訊為 AAC/MP3
+    """
+    streams = probe.get('streams', [])
+    
+    video_codecs = [s.get('codec_name') for s in streams if s.get('codec_type') == 'video']
+    audio_codecs = [s.get('codec_name') for s in streams if s.get('codec_type') == 'audio']
+    
+    return (
+        bool(video_codecs)
+        and all(codec in _MP4_VIDEO_CODECS for codec in video_codecs)
+        and all(codec in _MP4_AUDIO_CODECS for codec in audio_codecs)
+    )
+
+
+def _remux(input_file: str, output_file: str) -> None:
+    """
+    不重新編碼，只將串流重新封裝成 MP4
+    
+    Args:
+        input_file: 輸入檔案路徑
+        output_file: 輸出 MP4 檔案路徑
+        
+    Raises:
+        ffmpeg.Error: 如果 ffmpeg 執行失敗
+    """
+    _run_ffmpeg('-i', input_file, '-c', 'copy', *_MP4_OUTPUT_ARGS, output_file)
+
+
+def _transcode(
+    input_file: str,
+    output_file: str,
+    use_nvenc: bool,
+    info: Optional[dict] = None
+) -> None:
+    """
+    執行一次 ffmpeg 轉檔
+    
+    輸出 MP4 一律加上 +faststart（moov 放在檔頭，瀏覽器可邊下載邊播放），
+    並以 GOP_SECONDS 秒設定關鍵影格間隔；短於 SHORT_CLIP_SEC 的軟體編碼
+    片段另加 -tune fastdecode，降低日後播放的解碼負擔。
+    
+    Args:
+        input_file: 輸入檔案路徑
+        output_file: 輸出檔案路徑
+        use_nvenc: True 使用 CUDA 解碼 + h264_nvenc 編碼，否則使用 libx264
+        info: 輸入視訊資訊（_parse_video_info 的回傳值；None 時使用預設影格率）
+        
+    Raises:
+        ffmpeg.Error: 如果 ffmpeg 執行失敗
+    """
+    config = Config()
+    video_config = config.video
+    
+    info = info or {}
+    fps = info.get('fps') or config.camera.TARGET_FPS
+    gop = str(max(1, round(fps * video_config.GOP_SECONDS)))
+    
+    if use_nvenc:
+        _run_ffmpeg(
+            *_NVENC_INPUT_ARGS, '-i', input_file,
+            *_NVENC_OUTPUT_ARGS, '-g', gop, *_MP4_OUTPUT_ARGS, output_file
+        )
+    else:
+        tune = ()
+        if 0 < info.get('duration', 0) < video_config.SHORT_CLIP_SEC:
+            tune = ('-tune', 'fastdecode')
+        _run_ffmpeg(
+            '-i', input_file,
+            *_X264_OUTPUT_ARGS, *tune, '-g', gop, *_MP4_OUTPUT_ARGS, output_file
+        )
+
+
+def _transcode_pynvc(input_file: str, output_file: str, info: Optional[dict]) -> None:
+    """
+    以 PyNvVideoCodec 在 GPU 上解碼/編碼，ffmpeg 只負責封裝
+    
+    NVDEC 解出的影格留在顯示記憶體直接交給 NVENC 編碼成 H.264 基本串流，
+    再以 `ffmpeg -c copy` 封裝成 MP4（不重新編碼、不經過 CPU 影格）。
+    
+    Args:
+        input_file: 輸入檔案路徑
+        output_file: 輸出 MP4 檔案路徑
+        info: 輸入視訊資訊（_parse_video_info 的回傳值）
+        
+    Raises:
+        EmotionAnalysisError: 如果無法讀取輸入視訊資訊
+        ffmpeg.Error: 如果封裝失敗
+    """
+    if info is None:
+        raise EmotionAnalysisError(f"Cannot read video info: {input_file}")
+    
+    config = Config()
+    video_config = config.video
+    fps = info['fps'] or config.camera.TARGET_FPS
+    elementary_stream = Path(output_file).with_suffix('.h264')
+    
+    demuxer = pnvc.CreateDemuxer(filename=input_file)
+    decoder = pnvc.CreateDecoder(
+        gpuid=0, codec=demuxer.GetNvCodecId(), usedevicememory=True
+    )
+    encoder = pnvc.CreateEncoder(
+        info['width'], info['height'], 'NV12', False,
+        codec='h264',
+        preset=video_config.NVENC_PRESET.upper(),
+        fps=round(fps),
+        gop=max(1, round(fps * video_config.GOP_SECONDS)),
+        rc='vbr',
+        cq=video_config.NVENC_CQ
+    )
+    
+    try:
+        with open(elementary_stream, 'wb') as f:
+            for packet in demuxer:
+                for frame in decoder.Decode(packet):
+                    f.write(bytearray(encoder.Encode(frame)))
+            f.write(bytearray(encoder.EndEncode()))
+        
+        _run_ffmpeg(
+            '-f', 'h264', '-framerate', str(fps), '-i', str(elementary_stream),
+            '-c', 'copy', *_MP4_OUTPUT_ARGS, output_file
+        )
+    finally:
+        elementary_stream.unlink(missing_ok=True)
+
+
 def convert_avi_to_mp4(
     input_file: str,
     output_file: Optional[str] = None,
@@ -61,6 +535,12 @@ def convert_avi_to_mp4(
     """
     將 AVI 檔案轉換為 MP4 格式
     
+    輸入已是 H.264/HEVC（例如 GPU 寫入器錄製的檔案）時直接 stream copy，
+    不重新編碼。需要轉碼時：
+    安裝 PyNvVideoCodec 時直接在 GPU 上解碼/編碼，ffmpeg 只做封裝；
+    否則 ffmpeg 支援 h264_nvenc 時使用 GPU 解碼/編碼（NVENC_PRESET、NVENC_CQ）。
+    硬體路徑失敗或不可用時退回軟體編碼 (libx264)。輸出一律為 faststart MP4。
+    
     Args:
         input_file: 輸入 AVI 檔案路徑
         output_file: 輸出 MP4 檔案路徑（如未指定則自動生成）
@@ -82,14 +562,45 @@ def convert_avi_to_mp4(
         
         logger.info(f"Converting {input_file} to {output_file}...")
         
-        # 使用 ffmpeg 進行轉換
-        (
-            ffmpeg
-            .input(input_file)
-            .output(output_file)
-            .overwrite_output()
-            .run(capture_stdout=True, capture_stderr=True)
-        )
+        # 只執行一次 ffprobe：編碼判斷與轉碼參數共用同一份結果
+        probe = _probe(input_file)
+        info = _parse_video_info(probe, input_file) if probe else None
+        
+        # 已是 MP4 相容編碼：只重新封裝
+        converted = False
+        if _can_stream_copy(probe):
+            try:
+                _remux(input_file, output_file)
+                converted = True
+            except ffmpeg.Error as e:
+                logger.warning(
+                    f"Stream copy failed, re-encoding instead: "
+                    f"{e.stderr.decode(errors='replace').strip()}"
+                )
+        
+        # PyNvVideoCodec：解碼/編碼都不經過 ffmpeg 行程
+        if not converted and HAS_PYNVC:
+            try:
+                _transcode_pynvc(input_file, output_file, info)
+                converted = True
+            except Exception as e:
+                logger.warning(
+                    f"PyNvVideoCodec conversion failed, falling back to ffmpeg: {e}"
+                )
+        
+        # 使用 ffmpeg 進行轉換（優先使用 NVENC）
+        if not converted and _has_nvenc():
+            try:
+                _transcode(input_file, output_file, use_nvenc=True, info=info)
+                converted = True
+            except ffmpeg.Error as e:
+                logger.warning(
+                    f"NVENC conversion failed, falling back to software encoding: "
+                    f"{e.stderr.decode(errors='replace').strip()}"
+                )
+        
+        if not converted:
+            _transcode(input_file, output_file, use_nvenc=False, info=info)
         
         logger.info(f"Successfully converted to {output_file}")
         
@@ -111,12 +622,49 @@ def convert_avi_to_mp4(
         return False
 
 
-def release_video_resources(*writers: cv2.VideoWriter) -> None:
+def convert_avi_to_mp4_batch(
+    input_files: List[str],
+    concurrency: int = 3,
+    remove_source: bool = False
+) -> Dict[str, bool]:
+    """
+    同時轉換多個 AVI 檔案為 MP4
+    
+    每個檔案各由一個工作執行緒呼叫 convert_avi_to_mp4；ffmpeg 在子行程中執行
+    （PyNvVideoCodec 在原生程式碼中執行），不受 GIL 限制，多個轉檔可同時
+    佔用 NVENC/CPU 編碼器，攤平每個檔案的啟動成本。
+    每個檔案只執行一次 ffprobe，編碼判斷與轉碼參數共用其結果。
+    
+    Args:
+        input_files: 輸入 AVI 檔案路徑列表（輸出檔名自動生成為 .mp4）
+        concurrency: 同時轉換的檔案數
+        remove_source: 是否刪除原始檔案
+        
+    Returns:
+        輸入檔案路徑 -> 是否轉換成功
+    """
+    if not input_files:
+        return {}
+    
+    workers = max(1, min(concurrency, len(input_files)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='Transcode') as executor:
+        results = executor.map(
+            lambda path: convert_avi_to_mp4(path, remove_source=remove_source),
+            input_files
+        )
+        return dict(zip(input_files, results))
+
+
+def release_video_resources(
+    *writers: Union[ThreadedVideoWriter, cv2.VideoWriter, CudaVideoWriter]
+) -> None:
     """
     釋放視訊寫入器資源
     
+    ThreadedVideoWriter 會先寫完佇列中剩餘的影格並結束背景執行緒。
+    
     Args:
-        *writers: 一個或多個 VideoWriter 物件
+        *writers: 一個或多個 create_video_writer() 回傳的寫入器
     """
     for writer in writers:
         if writer is not None:
@@ -127,10 +675,79 @@ def release_video_resources(*writers: cv2.VideoWriter) -> None:
                 logger.error(f"Error releasing video writer: {e}")
 
 
+def _stream_fps(stream: dict) -> float:
+    """
+    由 ffprobe 串流資訊取得影格率
+    
+    影格率未知時 ffprobe 回報 '0/0'：依序改用 r_frame_rate、avg_frame_rate，
+    都無法使用時返回 0.0。
+    
+    Args:
+        stream: ffprobe 的視訊串流字典
+        
+    Returns:
+        每秒影格數（未知時為 0.0）
+    """
+    for key in ('r_frame_rate', 'avg_frame_rate'):
+        try:
+            fps = float(Fraction(stream.get(key) or '0'))
+        except (ValueError, ZeroDivisionError):
+            continue
+        if fps > 0:
+            return fps
+    return 0.0
+
+
+def _parse_video_info(probe: dict, video_path: str) -> Optional[dict]:
+    """
+    由 ffprobe 結果組出視訊資訊
+    
+    容器未記錄影格數時由長度與影格率推算。
+    
+    Args:
+        probe: ffprobe 結果字典
+        video_path: 視訊檔案路徑（僅用於記錄）
+        
+    Returns:
+        包含視訊資訊的字典，沒有視訊串流則返回 None
+    """
+    video_stream = next(
+        (stream for stream in probe.get('streams', [])
+         if stream.get('codec_type', 'video') == 'video'),
+        None
+    )
+    if video_stream is None:
+        logger.error(f"No video stream found: {video_path}")
+        return None
+    
+    fps = _stream_fps(video_stream)
+    duration = float(
+        probe.get('format', {}).get('duration')
+        or video_stream.get('duration')
+        or 0.0
+    )
+    frame_count = int(video_stream.get('nb_frames') or round(duration * fps))
+    
+    info = {
+        'width': int(video_stream['width']),
+        'height': int(video_stream['height']),
+        'fps': fps,
+        'frame_count': frame_count,
+        'duration': duration
+    }
+    
+    logger.info(f"Video info for {video_path}: {info}")
+    
+    return info
+
+
 def get_video_info(video_path: str) -> Optional[dict]:
     """
     獲取視訊檔案資訊
     
+    以 ffprobe 讀取容器中繼資料，不需開啟解碼器；容器未記錄影格數時
+    由長度與影格率推算。
+    
     Args:
         video_path: 視訊檔案路徑
         
@@ -138,26 +755,15 @@ def get_video_info(video_path: str) -> Optional[dict]:
         包含視訊資訊的字典，失敗則返回 None
     """
     try:
-        cap = cv2.VideoCapture(video_path)
-        
-        if not cap.isOpened():
-            logger.error(f"Failed to open video: {video_path}")
-            return None
-        
-        info = {
-            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
-            'fps': cap.get(cv2.CAP_PROP_FPS),
-            'frame_count': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
-            'duration': cap.get(cv2.CAP_PROP_FRAME_COUNT) / cap.get(cv2.CAP_PROP_FPS)
-        }
-        
-        cap.release()
-        
-        logger.info(f"Video info for {video_path}: {info}")
-        
-        return info
+        # 只讀容器/串流中繼資料，不初始化解碼器
+        probe = ffmpeg.probe(video_path, select_streams='v:0')
+        return _parse_video_info(probe, video_path)
         
+    except ffmpeg.Error as e:
+        logger.error(
+            f"FFprobe error for {video_path}: {e.stderr.decode(errors='replace').strip()}"
+        )
+        return None
     except Exception as e:
         logger.error(f"Error getting video info: {e}", exc_info=True)
         return None
@@ -3,18 +3,174 @@
 
 提供生成情緒分析圖表的功能。
 """
-import matplotlib.pyplot as plt
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import pandas as pd
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
 from pathlib import Path
 from typing import List, Tuple, Optional
 from collections import Counter
 
 from config import Config
 from utils.logging_config import get_logger
-from utils.analysis import categorize_emotion, map_emotion_to_score
+from utils.analysis import EMOTION_TO_CATEGORY
 
 logger = get_logger(__name__)
 
+# 情緒類別 -> 分數
+_CATEGORY_SCORES = {'positive': 1, 'neutral': 0, 'negative': -1}
+
+# 情緒 -> 分數查找表（依情緒 code 索引，模組載入時建立一次）
+# 未知情緒的 code 為 -1，對應到最後附加的中性分數 0
+_EMOTION_KEYS = pd.Index(list(EMOTION_TO_CATEGORY))
+_SCORES = np.array(
+    [_CATEGORY_SCORES[category] for category in EMOTION_TO_CATEGORY.values()] + [0],
+    dtype=np.int8
+)
+
+
+# 每個執行緒各自重複使用的 Figure：figsize -> (Figure, Axes)
+_figures = threading.local()
+
+# 圖表繪製執行緒池（常駐，讓各執行緒的 Figure 可跨呼叫重複使用）
+_chart_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='Chart')
+
+
+def _get_axes(figsize: Tuple[int, int]) -> Tuple[Figure, Axes]:
+    """
+    取得（必要時建立）本執行緒指定尺寸的 Figure，並清空其 Axes
+    
+    直接使用 matplotlib.figure.Figure（Agg 繪圖，不經過 pyplot 的全域狀態與
+    GUI 後端），每張圖表只需 ax.cla()，不必每次重新配置 Figure/Axes。
+    
+    Args:
+        figsize: 圖表尺寸
+        
+    Returns:
+        Tuple[Figure, Axes]: 已清空的 (Figure, Axes)
+    """
+    figures = getattr(_figures, 'figures', None)
+    if figures is None:
+        figures = _figures.figures = {}
+    
+    key = tuple(figsize)
+    if key not in figures:
+        fig = Figure(figsize=key)
+        figures[key] = (fig, fig.add_subplot())
+    
+    fig, ax = figures[key]
+    ax.cla()
+    return fig, ax
+
+
+# 圖表 JPEG/WebP 編碼參數：品質 85、不做額外的 Huffman 最佳化/漸進式掃描
+# （安裝 pillow-simd 取代 Pillow 時由 SIMD 加速的 libjpeg-turbo 編碼）
+_PIL_KWARGS = {'quality': 85, 'optimize': False, 'progressive': False}
+
+
+def _save_chart(fig: Figure, output_path: str):
+    """
+    依副檔名儲存圖表：.svg 輸出向量圖、.webp 輸出 WebP，否則輸出 JPEG
+    
+    SVG 直接輸出路徑，不經過點陣化與影像編碼；並略過 Date 中繼資料。
+    
+    Args:
+        fig: 要儲存的 Figure
+        output_path: 輸出檔案路徑
+    """
+    suffix = Path(output_path).suffix.lower()
+    if suffix == '.svg':
+        fig.savefig(output_path, format='svg', bbox_inches='tight', metadata={'Date': None})
+        return
+    
+    image_format = 'webp' if suffix == '.webp' else 'jpg'
+    fig.savefig(
+        output_path,
+        format=image_format,
+        dpi=100,
+        bbox_inches='tight',
+        pil_kwargs=_PIL_KWARGS
+    )
+
+
+def _warm_up():
+    """
+    模組載入時先繪製並編碼一張極小的圖表
+    
+    讓字型查找快取、Agg 繪圖器與 Pillow JPEG 編碼器的一次性初始化發生在
+    啟動時，而不是落在工作階段結束後第一張圖表上。
+    """
+    try:
+        fig = Figure(figsize=(1, 1))
+        ax = fig.add_subplot()
+        ax.plot([0, 1], [0, 1])
+        ax.set_title('warmup')
+        fig.savefig(io.BytesIO(), format='jpg', dpi=10, pil_kwargs=_PIL_KWARGS)
+    except Exception as e:
+        logger.debug(f"Matplotlib warm-up skipped: {e}")
+
+
+_warm_up()
+
+
+# 波動圖最多繪製的點數（約為輸出圖寬的 2 倍像素；更多點只會彼此重疊）
+_MAX_PLOT_POINTS = 2000
+
+
+def _plot_wave(ax: Axes, scores: np.ndarray, **kwargs):
+    """
+    繪製情緒波動曲線；點數超過 _MAX_PLOT_POINTS 時先以區塊平均降採樣
+    
+    x 軸維持原始影格編號（每個區塊取其起始影格），長序列關閉反鋸齒
+    以縮短線段繪製時間。
+    
+    Args:
+        ax: 目標 Axes
+        scores: 每幀情緒分數
+        **kwargs: 傳給 ax.plot 的參數（label、color 等）
+    """
+    n = scores.size
+    if n <= _MAX_PLOT_POINTS:
+        ax.plot(scores, **kwargs)
+        return
+    
+    stride = -(-n // _MAX_PLOT_POINTS)  # ceil
+    starts = np.arange(0, n, stride)
+    sizes = np.diff(np.append(starts, n))
+    means = np.add.reduceat(scores.astype(np.float32), starts) / sizes
+    ax.plot(starts, means, linewidth=0.8, antialiased=False, **kwargs)
+
+
+def _emotion_codes(emotions: List[str]) -> np.ndarray:
+    """
+    將情緒列表轉為 code（索引 _EMOTION_KEYS，未知情緒為 -1）
+    
+    以 pandas 的雜湊表一次查完整個列表，不逐一呼叫 Python 函式。
+    
+    Args:
+        emotions: 情緒列表
+        
+    Returns:
+        整數 code 陣列
+    """
+    return _EMOTION_KEYS.get_indexer(emotions)
+
+
+def _emotion_scores(emotions: List[str]) -> np.ndarray:
+    """
+    一次查表將情緒列表映射為分數（1 正面、0 中性、-1 負面）
+    
+    Args:
+        emotions: 情緒列表
+        
+    Returns:
+        int8 分數陣列
+    """
+    return _SCORES[_emotion_codes(emotions)]
+
 
 def generate_emotion_wave_chart(
     emotions: List[str],
@@ -42,21 +198,20 @@ def generate_emotion_wave_chart(
             return False
         
         # 將情緒映射為數值
-        emotion_scores = [map_emotion_to_score(e) for e in emotions]
+        emotion_scores = _emotion_scores(emotions)
         
         # 建立圖表
-        plt.figure(figsize=figsize)
-        plt.plot(emotion_scores, label='Emotion Wave', color=color)
-        plt.axhline(y=0, color='gray', linestyle='--')
-        plt.yticks([-1, 0, 1], ['Negative', 'Neutral', 'Positive'])
-        plt.title(title)
-        plt.xlabel("Frame")
-        plt.ylabel("Emotion")
-        plt.legend()
+        fig, ax = _get_axes(figsize)
+        _plot_wave(ax, emotion_scores, label='Emotion Wave', color=color)
+        ax.axhline(y=0, color='gray', linestyle='--')
+        ax.set_yticks([-1, 0, 1], ['Negative', 'Neutral', 'Positive'])
+        ax.set_title(title)
+        ax.set_xlabel("Frame")
+        ax.set_ylabel("Emotion")
+        ax.legend()
         
         # 儲存圖表
-        plt.savefig(output_path, format='jpg', dpi=100, bbox_inches='tight')
-        plt.close()
+        _save_chart(fig, output_path)
         
         logger.info(f"Emotion wave chart saved to {output_path}")
         return True
@@ -89,42 +244,26 @@ def generate_emotion_bar_chart(
             logger.warning("No emotions provided for bar chart")
             return False
         
-        # 計算各類情緒的比例
-        positive_count = sum(
-            1 for e in emotions 
-            if categorize_emotion(e) == 'positive'
-        )
-        negative_count = sum(
-            1 for e in emotions 
-            if categorize_emotion(e) == 'negative'
-        )
-        neutral_count = sum(
-            1 for e in emotions 
-            if categorize_emotion(e) == 'neutral'
-        )
-        
-        total = len(emotions)
-        percentages = [
-            negative_count / total,
-            neutral_count / total,
-            positive_count / total
-        ]
+        # 計算各類情緒的比例：分數 -1/0/1 平移為 0/1/2 後一次 bincount
+        # （順序即為 Negative、Neutral、Positive）
+        counts = np.bincount(_emotion_scores(emotions) + 1, minlength=3)
+        percentages = counts / counts.sum()
         
         # 建立圖表
         categories = ['Negative', 'Neutral', 'Positive']
         colors = ['red', 'gray', 'green']
         
-        plt.figure(figsize=figsize)
-        bars = plt.bar(categories, percentages, color=colors)
-        plt.title(title)
-        plt.xlabel('Sentiment')
-        plt.ylabel('Proportion')
-        plt.ylim(0, 1)
+        fig, ax = _get_axes(figsize)
+        bars = ax.bar(categories, percentages, color=colors)
+        ax.set_title(title)
+        ax.set_xlabel('Sentiment')
+        ax.set_ylabel('Proportion')
+        ax.set_ylim(0, 1)
         
         # 在長條上標註百分比
         for bar in bars:
             height = bar.get_height()
-            plt.text(
+            ax.text(
                 bar.get_x() + bar.get_width() / 2,
                 height,
                 f'{height:.2%}',
@@ -135,8 +274,7 @@ def generate_emotion_bar_chart(
             )
         
         # 儲存圖表
-        plt.savefig(output_path, format='jpg', dpi=100, bbox_inches='tight')
-        plt.close()
+        _save_chart(fig, output_path)
         
         logger.info(f"Emotion bar chart saved to {output_path}")
         return True
@@ -176,23 +314,22 @@ def generate_combined_wave_chart(
             return False
         
         # 將情緒映射為數值
-        scores1 = [map_emotion_to_score(e) for e in emotions1]
-        scores2 = [map_emotion_to_score(e) for e in emotions2]
+        scores1 = _emotion_scores(emotions1)
+        scores2 = _emotion_scores(emotions2)
         
         # 建立圖表
-        plt.figure(figsize=figsize)
-        plt.plot(scores1, label=label1, color='#1f77b4')
-        plt.plot(scores2, label=label2, color='#ff7f0e')
-        plt.axhline(y=0, color='gray', linestyle='--')
-        plt.yticks([-1, 0, 1], ['Negative', 'Neutral', 'Positive'])
-        plt.title(title)
-        plt.xlabel("Frame")
-        plt.ylabel("Emotion")
-        plt.legend()
+        fig, ax = _get_axes(figsize)
+        _plot_wave(ax, scores1, label=label1, color='#1f77b4')
+        _plot_wave(ax, scores2, label=label2, color='#ff7f0e')
+        ax.axhline(y=0, color='gray', linestyle='--')
+        ax.set_yticks([-1, 0, 1], ['Negative', 'Neutral', 'Positive'])
+        ax.set_title(title)
+        ax.set_xlabel("Frame")
+        ax.set_ylabel("Emotion")
+        ax.legend()
         
         # 儲存圖表
-        plt.savefig(output_path, format='jpg', dpi=100, bbox_inches='tight')
-        plt.close()
+        _save_chart(fig, output_path)
         
         logger.info(f"Combined wave chart saved to {output_path}")
         return True
@@ -221,14 +358,18 @@ def generate_demographics_title(
             return "Emotion Analysis"
         
         # 計算平均年齡
-        avg_age = round(np.mean(ages))
+        avg_age = int(round(np.mean(np.asarray(ages, dtype=np.int32))))
+        
+        # 一次拆開 (性別, 信心度) 列表
+        gender_labels, confidences = zip(*genders)
         
         # 找出最常見的性別
-        gender_counts = Counter(gender for gender, _ in genders)
-        most_common_gender = gender_counts.most_common(1)[0][0]
+        most_common_gender = Counter(gender_labels).most_common(1)[0][0]
         
         # 計算平均性別信心度
-        avg_confidence = np.mean([conf for _, conf in genders])
+        avg_confidence = np.fromiter(
+            confidences, dtype=np.float64, count=len(confidences)
+        ).mean()
         
         title = (
             f"Emotion Analysis "
@@ -248,10 +389,11 @@ def generate_all_charts(
     ages: List[int],
     genders: List[Tuple[str, float]],
     camera_name: str = "Camera",
-    output_dir: Optional[str] = None
+    output_dir: Optional[str] = None,
+    raster: bool = True
 ) -> bool:
     """
-    生成所有圖表（波動圖 + 長條圖）
+    生成所有圖表（波動圖 + 長條圖，兩者同時生成）
     
     Args:
         emotions: 情緒列表
@@ -259,6 +401,7 @@ def generate_all_charts(
         genders: 性別列表
         camera_name: 攝影機名稱
         output_dir: 輸出目錄（如未指定則使用當前目錄）
+        raster: True 輸出 JPEG（報表頁面引用 .jpg）；False 輸出 SVG 向量圖
         
     Returns:
         True 如果所有圖表都生成成功
@@ -273,23 +416,24 @@ def generate_all_charts(
         # 生成標題
         title_base = generate_demographics_title(ages, genders)
         
-        # 生成波動圖
-        wave_path = output_dir / f"{camera_name}_Emotion_Wave.jpg"
-        wave_success = generate_emotion_wave_chart(
+        # 波動圖與長條圖互不相依，同時生成（各執行緒使用自己的 Figure）
+        suffix = '.jpg' if raster else '.svg'
+        wave_path = output_dir / f"{camera_name}_Emotion_Wave{suffix}"
+        bar_path = output_dir / f"{camera_name}_Emotion_Bar{suffix}"
+        
+        wave_future = _chart_executor.submit(
+            generate_emotion_wave_chart,
             emotions,
             str(wave_path),
             title=f"{title_base} - Wave"
         )
-        
-        # 生成長條圖
-        bar_path = output_dir / f"{camera_name}_Emotion_Bar.jpg"
-        bar_success = generate_emotion_bar_chart(
+        bar_future = _chart_executor.submit(
+            generate_emotion_bar_chart,
             emotions,
             str(bar_path),
             title=f"Sentiment Analysis - {camera_name}"
         )
-        
-        return wave_success and bar_success
+        return wave_future.result() and bar_future.result()
         
     except Exception as e:
         logger.error(f"Error generating all charts: {e}", exc_info=True)